@@ -0,0 +1,333 @@
+"""
+Measures how fast Python Poker evaluates hands, finds the winners of
+showdowns and reads cards typed by the user, and compares the results
+with a stored baseline so that changes which slow them down are found
+before they are released
+
+    python3 benchmark.py
+    python3 benchmark.py --save-baseline
+"""
+import argparse
+import gc
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+import run
+from poker import CARDS, get_best_hand
+from poker.evaluator import get_wildcard_value
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+RESULTS_VERSION = 1
+# A benchmark has regressed if it is this much slower than the baseline
+DEFAULT_TOLERANCE = 0.2
+# The rank used for wild cards, and the numbers of them in each hand
+WILD_RANK = 2
+WILDCARD_NUMBERS = [0, 1, 2, 3]
+SHOWDOWN_SIZES = [2, 6, 10, 25, 50]
+# Cards in short notation, which are looked up directly
+SHORT_CARD_INPUTS = ['Kh', '10d', 'as', 'QS', '7c', 'Td', '2h', 'jc']
+# Cards typed out in full, some with spelling mistakes or no spaces
+FUZZY_CARD_INPUTS = [
+    'Ace of Spades', 'king hearts', '10 of diamonds', 'Queen of Clubs',
+    'jack of harts', 'seven of spades', 'kng of dimonds', 'quen clubs',
+    '2 of hearts', 'acespades', 'nine of clubs', 'Four Diamonds'
+]
+# Words typed by the user and the word they are compared to
+WORD_INPUTS = [
+    ('yes', 'Yes'), ('yesterday', 'Yes'), ('nope', 'No'),
+    ('hearts', 'Hearts'), ('harts', 'Hearts'), ('spdes', 'Spades'),
+    ('queen', 'Queen'), ('quen', 'Queen'), ('10', '10'), ('random', 'Ace')
+]
+
+
+def time_calls(call, arguments, repeat, setup=None):
+    """
+    Calls a function once with each item in a list of arguments,
+    repeat times over, and returns how long each call took in
+    nanoseconds in the fastest repeat. Like timeit, the fastest
+    repeat is kept as the others were slowed down by other programs,
+    and garbage collection is turned off while timing. setup is
+    called before each repeat
+    """
+    best_durations = None
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            if setup is not None:
+                setup()
+            durations = []
+            for argument in arguments:
+                start = time.perf_counter_ns()
+                call(argument)
+                durations.append(time.perf_counter_ns() - start)
+            if best_durations is None or sum(durations) < sum(
+                    best_durations):
+                best_durations = durations
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best_durations
+
+
+def get_result(durations, hands_per_call=1):
+    """
+    Returns the number of calls per second and the median and 99th
+    percentile time of a call in microseconds, from a list of call
+    durations
+    """
+    total_seconds = sum(durations) / 1e9
+    ordered = sorted(durations)
+    result = {
+        'calls': len(durations),
+        'per_second': round(len(durations) / total_seconds, 1),
+        'p50_us': round(ordered[len(ordered) // 2] / 1000, 2),
+        'p99_us': round(ordered[int(len(ordered) * 0.99)] / 1000, 2)
+    }
+    if hands_per_call != 1:
+        result['hands_per_second'] = round(
+            result['per_second'] * hands_per_call, 1
+        )
+    return result
+
+
+def deal_hand(rng, card_number, wildcard_number):
+    """
+    Returns a random Hand of card_number cards, wildcard_number of
+    which have the wild rank
+    """
+    wild_cards = [card for card in CARDS if card.rank == WILD_RANK]
+    other_cards = [card for card in CARDS if card.rank != WILD_RANK]
+    cards = rng.sample(wild_cards, wildcard_number)
+    cards += rng.sample(other_cards, card_number - wildcard_number)
+    rng.shuffle(cards)
+    return run.Hand('Player', cards)
+
+
+def benchmark_evaluation(rng, calls, repeat):
+    """
+    Times Hand.get_value for every number of cards and wild cards.
+    Each hand is evaluated once before it is timed, filling in the
+    rank tables as a running game would have them. Remembered wild
+    card values are cleared before each repeat, so every hand with
+    wild cards is evaluated in full unless an earlier hand in the
+    same repeat had the same value
+    """
+    results = {}
+    wildcards = [WILD_RANK]
+    for card_number in range(5, 9):
+        for wildcard_number in WILDCARD_NUMBERS:
+            hands = [
+                deal_hand(rng, card_number, wildcard_number)
+                for i in range(calls)
+            ]
+            for hand in hands:
+                hand.get_value(wildcards)
+            durations = time_calls(
+                lambda hand: hand.get_value(wildcards), hands, repeat,
+                get_wildcard_value.cache_clear
+            )
+            name = f'evaluate/{card_number} cards/{wildcard_number} wild'
+            results[name] = get_result(durations)
+    return results
+
+
+def play_showdown(hands):
+    """
+    Evaluates every hand in a showdown and returns the winners
+    """
+    for hand in hands:
+        hand.value = hand.get_value()
+    return get_best_hand(hands)
+
+
+def benchmark_showdowns(rng, calls, repeat):
+    """
+    Times evaluating and finding the winners of showdowns between
+    each number of hands in SHOWDOWN_SIZES, with 7 card hands that
+    can share cards, as only their values are compared
+    """
+    results = {}
+    for size in SHOWDOWN_SIZES:
+        showdowns = [
+            [deal_hand(rng, 7, 0) for i in range(size)]
+            for j in range(max(1, calls // size))
+        ]
+        for hands in showdowns:
+            play_showdown(hands)
+        durations = time_calls(play_showdown, showdowns, repeat)
+        results[f'showdown/{size} hands'] = get_result(durations, size)
+    return results
+
+
+def convert_card(text, deck, output):
+    """
+    Reads a single typed card, and puts the card back in the deck
+    """
+    card = run.CardInput(text).convert(deck, output)
+    if card is not None:
+        deck.return_cards([card])
+
+
+def benchmark_parsing(rng, calls, repeat):
+    """
+    Times CardInput.convert with cards in short notation and typed
+    out in full, and contains_word with words typed by the user
+    """
+    results = {}
+    deck = run.Deck()
+    # Cards that can't be read print an error, which isn't needed
+    output = io.StringIO()
+    for name, inputs in (
+            ('parse/short cards', SHORT_CARD_INPUTS),
+            ('parse/fuzzy cards', FUZZY_CARD_INPUTS)):
+        texts = [rng.choice(inputs) for i in range(calls)]
+        durations = time_calls(
+            lambda text: convert_card(text, deck, output), texts, repeat
+        )
+        results[name] = get_result(durations)
+    words = [rng.choice(WORD_INPUTS) for i in range(calls)]
+    durations = time_calls(
+        lambda pair: run.contains_word(pair[0], pair[1]), words, repeat
+    )
+    results['parse/contains_word'] = get_result(durations)
+    return results
+
+
+def run_benchmarks(calls=2000, repeat=5, seed=0):
+    """
+    Runs every benchmark and returns the results as a dictionary
+    that can be written as JSON
+    """
+    rng = random.Random(seed)
+    results = {}
+    results.update(benchmark_evaluation(rng, calls, repeat))
+    results.update(benchmark_showdowns(rng, calls, repeat))
+    results.update(benchmark_parsing(rng, calls, repeat))
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'calls': calls,
+        'repeat': repeat,
+        'seed': seed,
+        'results': results
+    }
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Returns the change in calls per second of every benchmark in
+    both results and baseline, as a list of dictionaries with the
+    keys 'name', 'baseline', 'current', 'change' and 'regressed'
+    """
+    comparisons = []
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['per_second']
+        change = result['per_second'] / before - 1
+        comparisons.append({
+            'name': name,
+            'baseline': before,
+            'current': result['per_second'],
+            'change': round(change, 3),
+            'regressed': change < -tolerance
+        })
+    return comparisons
+
+
+def print_results(results, comparisons=None):
+    """
+    Prints the results of every benchmark, along with the change
+    from the baseline if there is one
+    """
+    changes = {}
+    for comparison in comparisons or []:
+        changes[comparison['name']] = comparison
+    print(f'{"Benchmark":<30}{"Calls/s":>12}{"p50 us":>10}{"p99 us":>10}')
+    for name, result in results['results'].items():
+        line = (
+            f'{name:<30}{result["per_second"]:>12.0f}'
+            f'{result["p50_us"]:>10.2f}{result["p99_us"]:>10.2f}'
+        )
+        if name in changes:
+            line += f'{changes[name]["change"]:>+9.1%}'
+            if changes[name]['regressed']:
+                line += '  REGRESSED'
+        print(line)
+
+
+def main():
+    """
+    Runs the benchmarks from the command line options. Exits with
+    a status of 1 if any benchmark regressed from the baseline
+    """
+    parser = argparse.ArgumentParser(
+        description='Measure the speed of Python Poker'
+    )
+    parser.add_argument(
+        '--calls', type=int, default=2000,
+        help='the number of calls timed in each benchmark (default: 2000)'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='how many times each benchmark is timed, keeping the '
+        'fastest (default: 5)'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--output', default=DEFAULT_OUTPUT,
+        help=f'where to write the results (default: {DEFAULT_OUTPUT})'
+    )
+    parser.add_argument(
+        '--baseline', default=DEFAULT_BASELINE,
+        help=f'the results to compare with (default: {DEFAULT_BASELINE})'
+    )
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='write the results to the baseline instead of comparing them'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='how much slower than the baseline a benchmark can be '
+        f'before it has regressed (default: {DEFAULT_TOLERANCE})'
+    )
+    arguments = parser.parse_args()
+    if arguments.calls < 1 or arguments.repeat < 1:
+        parser.error('At least 1 call and 1 repeat are needed')
+
+    results = run_benchmarks(
+        arguments.calls, arguments.repeat, arguments.seed
+    )
+    comparisons = None
+    if not arguments.save_baseline:
+        try:
+            with open(arguments.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+            comparisons = compare_results(
+                results, baseline, arguments.tolerance
+            )
+            results['comparisons'] = comparisons
+        except FileNotFoundError:
+            print(f'No baseline found at {arguments.baseline}\n')
+    output = arguments.baseline if arguments.save_baseline else (
+        arguments.output
+    )
+    with open(output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+    print_results(results, comparisons)
+    print(f'\nResults written to {output}')
+    if comparisons and any(
+            comparison['regressed'] for comparison in comparisons):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,10 @@
 const Pty = require('node-pty');
 const fs = require('fs');
+const net = require('net');
+
+// When set, every terminal plays on a single "python3 run.py --sessions"
+// process listening on this port, instead of starting its own process
+const SESSIONS_PORT = process.env.POKER_SESSIONS_PORT;
 
 exports.install = function () {
 
@@ -15,6 +20,11 @@ function socket() {
 
     this.on('open', function (client) {
 
+        if (SESSIONS_PORT) {
+            openSession(client);
+            return;
+        }
+
         // Spawn terminal
         client.tty = Pty.spawn('python3', ['run.py'], {
             name: 'xterm-color',
@@ -37,6 +47,10 @@ function socket() {
     });
 
     this.on('close', function (client) {
+        if (client.session) {
+            client.session.destroy();
+            client.session = null;
+        }
         if (client.tty) {
             client.tty.kill(9);
             client.tty = null;
@@ -46,6 +60,27 @@ function socket() {
 
     this.on('message', function (client, msg) {
         client.tty && client.tty.write(msg);
+        client.session && client.session.write(msg);
+    });
+}
+
+function openSession(client) {
+
+    // Connect to the shared game process
+    client.session = net.connect(parseInt(SESSIONS_PORT), '127.0.0.1');
+
+    client.session.on('data', function (data) {
+        client.send(data.toString());
+    });
+
+    client.session.on('close', function () {
+        client.session = null;
+        client.close();
+        console.log("Session closed");
+    });
+
+    client.session.on('error', function (err) {
+        console.log('Session error: ', err);
     });
 }
 
@@ -0,0 +1,17 @@
+"""
+The Python Poker evaluation engine. Importing this package
+never starts the terminal game, so the functions below can be
+used by any long-lived process
+"""
+from .cards import (
+    CARDS, FULL_DECK, RANK_NAMES, RANKS, SUITS, Card, get_card_description,
+    get_card_id, get_rank_name, get_rank_value, parse_card, parse_cards,
+    split_cards
+)
+from .evaluator import (
+    compare_values, create_value_dict, evaluate, get_best_hand,
+    get_hand_strength, get_top_hands, rank_hands
+)
+# Imported last, so profiling can replace the functions above when
+# the POKER_PROFILE environment variable is set
+from .profiling import profile
@@ -0,0 +1,156 @@
+"""
+Evaluates large arrays of hands at once with NumPy. This module needs
+NumPy to be installed, unlike the rest of the poker package
+"""
+import numpy as np
+
+from .evaluator import get_wildcard_value
+from .tables import (
+    RANK_KEY_STRENGTHS, SCORE_SHIFT, SUIT_STRENGTHS, get_rank_key_strength
+)
+
+SUIT_STRENGTH_TABLE = np.array(SUIT_STRENGTHS, dtype=np.int64)
+# The base 5 digit of each rank, the same as CARD_RANK_KEYS
+RANK_KEYS = 5 ** np.arange(13, dtype=np.int64)
+# Random deals are made and evaluated this many at a time by
+# poker/ranges.py and poker/preflop.py, to limit the memory they use
+BATCH_SIZE = 20000
+
+
+def evaluate_batch(cards, wildcards=()):
+    """
+    Returns the strengths and scores of an (N, k) array of card
+    integers, where each row is a hand of k cards from 5 to 8,
+    as two arrays of length N
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 8:
+        raise ValueError('Hands must be an (N, k) array, with k from 5 to 8')
+    if cards.size and (cards.min() < 0 or cards.max() > 51):
+        raise ValueError('Cards must be integers from 0 to 51')
+    sorted_cards = np.sort(cards, axis=1)
+    if np.any(sorted_cards[:, 1:] == sorted_cards[:, :-1]):
+        raise ValueError('A hand cannot contain the same card twice')
+
+    # Ranks are counted from 0 here, so rank 2 is 0 and Ace is 12
+    ranks = cards // 4
+    suits = cards % 4
+    is_wild = np.isin(ranks + 2, list(wildcards))
+    rank_bits = np.where(is_wild, 0, 1 << ranks)
+    suit_bits = np.stack([
+        np.bitwise_or.reduce(np.where(suits == suit, rank_bits, 0), axis=1)
+        for suit in range(4)
+    ], axis=1)
+    wild_counts = is_wild.sum(axis=1)
+
+    strengths = np.zeros(len(cards), dtype=np.int64)
+    plain = wild_counts == 0
+    if plain.any():
+        rank_keys = RANK_KEYS[ranks[plain]].sum(axis=1)
+        strengths[plain] = np.maximum(
+            get_rank_key_strengths(rank_keys),
+            SUIT_STRENGTH_TABLE[suit_bits[plain]].max(axis=1)
+        )
+    wild = ~plain
+    if wild.any():
+        strengths[wild] = get_wildcard_strengths(
+            suit_bits[wild], wild_counts[wild]
+        )
+    return strengths, strengths >> SCORE_SHIFT
+
+
+def get_rank_key_strengths(rank_keys):
+    """
+    Returns the strength of each base 5 rank key in an array,
+    looking up each different key only once
+    """
+    unique_keys, inverse = np.unique(rank_keys, return_inverse=True)
+    unique_strengths = np.empty(len(unique_keys), dtype=np.int64)
+    for index, rank_key in enumerate(unique_keys.tolist()):
+        strength = RANK_KEY_STRENGTHS.get(rank_key)
+        if strength is None:
+            strength = get_rank_key_strength(rank_key)
+        unique_strengths[index] = strength
+    return unique_strengths[inverse.reshape(-1)]
+
+
+def get_wildcard_strengths(suit_bits, wild_counts):
+    """
+    Returns the strength of each hand with wild cards, given the
+    rank bits of its other cards in each suit and its number of
+    wild cards. Hands that are the same apart from their suits
+    are only evaluated once, but each of those is still evaluated
+    in Python by get_wildcard_value, so hands with wild cards are
+    around 10 times slower than hands without them. Its cache only
+    holds WILDCARD_CACHE_SIZE hands, so on large batches it doesn't
+    get faster when the same hands are evaluated again
+    """
+    # Ordering the suits the same way as resolve_wildcards, and
+    # packing them with the number of wild cards into one key
+    suit_bits = -np.sort(-suit_bits, axis=1)
+    keys = wild_counts.astype(np.int64)
+    for suit in range(4):
+        keys = keys | (suit_bits[:, suit] << (4 + 13 * suit))
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    unique_strengths = np.empty(len(unique_keys), dtype=np.int64)
+    for index, key in enumerate(unique_keys.tolist()):
+        # The evaluator stores rank bits starting from rank 2
+        hand_bits = tuple(
+            ((key >> (4 + 13 * suit)) & 8191) << 2 for suit in range(4)
+        )
+        value = get_wildcard_value(hand_bits, key & 15)
+        unique_strengths[index] = value['strength']
+    return unique_strengths[inverse.reshape(-1)]
+
+
+def deal_batch(
+    deal_number, players, card_number, known_cards=(), seed=None,
+    deal_known_cards=None
+):
+    """
+    Returns deal_number random deals as an array of card integers with
+    the shape (deal_number, players, card_number). No card is dealt
+    twice in the same deal, and cards in known_cards are never dealt.
+    deal_known_cards can be a (deal_number, k) array of other cards
+    that are never dealt in each deal, such as the hands of a range.
+    seed can be an integer or a NumPy Generator, and the same seed
+    always gives the same deals. Every deal is made at once, so
+    many deals are best made BATCH_SIZE at a time
+    """
+    known_cards = {int(card) for card in known_cards}
+    deck_cards = np.array(
+        [card for card in range(52) if card not in known_cards],
+        dtype=np.int8
+    )
+    if deal_known_cards is not None:
+        deal_known_cards = np.asarray(deal_known_cards, dtype=np.int64)
+        if deal_known_cards.shape[0] != deal_number:
+            raise ValueError('deal_known_cards needs a row for each deal')
+    needed = players * card_number
+    if needed > len(deck_cards):
+        raise ValueError('Not enough cards in the deck for every hand')
+    rng = np.random.default_rng(seed)
+    cards = np.tile(deck_cards, (deal_number, 1))
+    rows = np.arange(deal_number)
+    # The number of cards at the start of each deal's deck that
+    # can be dealt
+    available = len(deck_cards)
+    if deal_known_cards is not None:
+        # Moving the known cards of each deal to the end of its deck
+        known = np.zeros((deal_number, 52), dtype=bool)
+        known[rows[:, None], deal_known_cards] = True
+        known = known[:, deck_cards]
+        cards = np.take_along_axis(
+            cards, np.argsort(known, axis=1, kind='stable'), axis=1
+        )
+        available = len(deck_cards) - known.sum(axis=1)
+        if np.any(available < needed):
+            raise ValueError('Not enough cards in the deck for every hand')
+    # Shuffling only as many cards as are needed, swapping each
+    # position with a random card at or after it in every deal
+    for position in range(needed):
+        swaps = rng.integers(position, available, deal_number)
+        swapped = cards[rows, swaps]
+        cards[rows, swaps] = cards[:, position]
+        cards[:, position] = swapped
+    return cards[:, :needed].reshape(deal_number, players, card_number)
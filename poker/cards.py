@@ -0,0 +1,183 @@
+"""
+Card data shared by the evaluation engine and the terminal game
+"""
+import re
+
+# The names of the ranks above 10, starting with the 11th rank
+RANK_NAMES = ['Jack', 'Queen', 'King', 'Ace']
+SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+SUIT_INDEXES = {suit: index for index, suit in enumerate(SUITS)}
+RANKS = range(2, 15)
+
+# The rank and suit index of every card integer, so neither has to
+# be calculated during an evaluation
+CARD_RANKS = [card // 4 + 2 for card in range(52)]
+CARD_SUITS = [card % 4 for card in range(52)]
+
+# How each rank is written in short card notation, such as "Kh" or "10d"
+RANK_TOKENS = {
+    '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9,
+    '10': 10, 't': 10, 'j': 11, 'q': 12, 'k': 13, 'a': 14
+}
+# The single letter of each rank in range notation, such as "AKs"
+RANK_LETTERS = {
+    token.upper(): rank for token, rank in RANK_TOKENS.items()
+    if len(token) == 1
+}
+# A single card in short notation, in lower case
+CARD_PATTERN = re.compile(r'(?:10|[2-9tjqka])[hdcs]')
+
+
+class Card(int):
+    """
+    A single card consisting of a rank and a suit. Each card is
+    stored as an integer from 0 to 51, equal to (rank - 2) * 4 plus
+    the index of its suit in SUITS. Only 52 instances ever exist,
+    and Card(rank, suit) returns the shared instance for that card
+    """
+    __slots__ = ()
+
+    def __new__(cls, rank, suit):
+        """
+        Returns the instance of Card with a given rank and suit
+        """
+        return CARDS[get_card_id(rank, suit)]
+
+    def __getnewargs__(self):
+        """
+        Returns the arguments used to recreate the card when it
+        is unpickled, so the shared instance is used
+        """
+        return (self.rank, self.suit)
+
+    def __repr__(self):
+        """
+        Returns the card as it would be created
+        """
+        return f'Card({self.rank}, {self.suit!r})'
+
+    @property
+    def rank(self):
+        """
+        The rank of the card, from 2 to 14 (Ace)
+        """
+        return CARD_RANKS[self]
+
+    @property
+    def suit(self):
+        """
+        The full name of the card's suit
+        """
+        return SUITS[CARD_SUITS[self]]
+
+    def description(self, wildcards=()):
+        """
+        Returns the cards rank and suit as a single word,
+        only giving the first letter of worded ranks and suits
+        and highlighting wild cards with **
+        """
+        wild = self.is_wild(wildcards)
+        desc_text = ''
+        if wild:
+            desc_text = '*'
+        rank = self.rank
+        simple_rank = rank
+        if rank > 10:
+            simple_rank = get_rank_name(rank)[0]
+        desc_text += f'{simple_rank}{self.suit[0]}'
+        if wild:
+            desc_text += '*'
+        return desc_text
+
+    def is_wild(self, wildcards):
+        """
+        Returns if this card is a wild card, given the
+        wild ranks of the round
+        """
+        return CARD_RANKS[self] in wildcards
+
+
+def get_card_id(rank, suit):
+    """
+    Returns the integer of a card with a given rank and suit.
+    The suit can be its name or its index in SUITS
+    """
+    if isinstance(suit, str):
+        suit = SUIT_INDEXES[suit]
+    return (rank - 2) * 4 + suit
+
+
+def get_rank_name(rank_number):
+    """
+    Returns the rank of a given card as a string,
+    consisting of the rank's full name
+    """
+    # For cards greater than 10
+    if rank_number > 10:
+        # The 11th rank will be "Jack", which is the first
+        # element [0] in RANK_NAMES
+        return RANK_NAMES[rank_number - 11]
+    return str(rank_number)
+
+
+def get_rank_value(rank_name):
+    """
+    Returns the rank of the card as an integer
+    """
+    if rank_name in RANK_NAMES:
+        return RANK_NAMES.index(rank_name) + 11
+    return int(rank_name)
+
+
+def parse_card(text):
+    """
+    Returns the card written in short notation, such as "Kh", "10d"
+    or "Ts", or None if the text isn't a single card in that notation
+    """
+    return CARD_TOKENS.get(text.strip().lower())
+
+
+def split_cards(text):
+    """
+    Returns the cards in short notation in some text, such as
+    "AsKdQh" or "As, Kd, Qh", as a list of their lower case text.
+    Returns None if any part of the text isn't a card
+    """
+    compact = ''.join(text.lower().split()).replace(',', '')
+    tokens = CARD_PATTERN.findall(compact)
+    # Any text that isn't part of a card is left out of the tokens
+    if len(tokens) == 0 or len(''.join(tokens)) != len(compact):
+        return None
+    return tokens
+
+
+def parse_cards(text):
+    """
+    Returns a list of the cards in short notation in some text,
+    or None if any part of the text isn't a card
+    """
+    tokens = split_cards(text)
+    if tokens is None:
+        return None
+    return [CARD_TOKENS[token] for token in tokens]
+
+
+def get_card_description(rank, suit):
+    """
+    Returns the cards rank and suit as a readable string
+    """
+    rank_name = get_rank_name(rank)
+    return f'{rank_name} of {suit}'
+
+
+# The only instances of Card, indexed by their integer
+CARDS = [int.__new__(Card, card) for card in range(52)]
+# Every card in the order a new deck is laid out, suit by suit
+FULL_DECK = [
+    CARDS[get_card_id(rank, suit)] for suit in SUITS for rank in RANKS
+]
+# Every card in short notation, in lower case
+CARD_TOKENS = {
+    rank_token + suit[0].lower(): CARDS[get_card_id(rank, suit)]
+    for rank_token, rank in RANK_TOKENS.items() for suit in SUITS
+}
@@ -0,0 +1,169 @@
+"""
+Evaluates every possible hand of 5, 6 or 7 cards from a single deck,
+counts how many hands have each value and checks the counts against
+the known number of poker hands of each value. The hands are split
+into chunks by their first 2 cards, which are shared between
+processes. This checks the evaluator against every hand it can be
+given, and times how long it takes to evaluate all of them
+
+    python3 -m poker.enumeration --cards 5
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from .evaluator import evaluate, get_hand_strength
+from .tables import HAND_NAMES, SCORE_SHIFT
+
+# The number of hands with each value, for the best 5 cards out of
+# every hand of 5, 6 and 7 cards
+KNOWN_COUNTS = {
+    5: {
+        'Royal Flush': 4,
+        'Straight Flush': 36,
+        '4 of a Kind': 624,
+        'Full House': 3744,
+        'Flush': 5108,
+        'Straight': 10200,
+        '3 of a Kind': 54912,
+        'Two Pair': 123552,
+        'Pair': 1098240,
+        'High Card': 1302540
+    },
+    6: {
+        'Royal Flush': 188,
+        'Straight Flush': 1656,
+        '4 of a Kind': 14664,
+        'Full House': 165984,
+        'Flush': 205792,
+        'Straight': 361620,
+        '3 of a Kind': 732160,
+        'Two Pair': 2532816,
+        'Pair': 9730740,
+        'High Card': 6612900
+    },
+    7: {
+        'Royal Flush': 4324,
+        'Straight Flush': 37260,
+        '4 of a Kind': 224848,
+        'Full House': 3473184,
+        'Flush': 4047644,
+        'Straight': 6180020,
+        '3 of a Kind': 6461620,
+        'Two Pair': 31433400,
+        'Pair': 58627800,
+        'High Card': 23294460
+    }
+}
+
+
+def count_chunk(first_cards, card_number, use_strength=False):
+    """
+    Returns the number of hands with each value name out of every
+    hand of card_number cards that starts with the 2 cards in
+    first_cards, where every other card is higher than both of them.
+    Values are found with evaluate, or with get_hand_strength if
+    use_strength is True
+    """
+    other_cards = combinations(
+        range(first_cards[1] + 1, 52), card_number - 2
+    )
+    hands = map(tuple(first_cards).__add__, other_cards)
+    if use_strength:
+        scores = Counter(
+            strength >> SCORE_SHIFT
+            for strength in map(get_hand_strength, hands)
+        )
+        return {HAND_NAMES[score]: number for score, number in scores.items()}
+    return dict(Counter(evaluate(hand)['name'] for hand in hands))
+
+
+def count_hands(card_number=5, workers=None, use_strength=False):
+    """
+    Returns the number of hands with each value name out of every
+    possible hand of card_number cards, evaluating chunks of hands
+    in separate processes unless workers is 1
+    """
+    if card_number not in KNOWN_COUNTS:
+        raise ValueError('Hands must have from 5 to 7 cards')
+    chunks = list(combinations(range(52), 2))
+    if workers == 1:
+        results = [
+            count_chunk(chunk, card_number, use_strength)
+            for chunk in chunks
+        ]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(
+                count_chunk, chunks, [card_number] * len(chunks),
+                [use_strength] * len(chunks), chunksize=16
+            ))
+    counts = Counter()
+    for result in results:
+        counts.update(result)
+    return dict(counts)
+
+
+def check_counts(counts, card_number):
+    """
+    Returns a list of the values whose count is different from the
+    known count, as (name, known count, count) tuples
+    """
+    mismatches = []
+    for name, known_count in KNOWN_COUNTS[card_number].items():
+        if counts.get(name, 0) != known_count:
+            mismatches.append((name, known_count, counts.get(name, 0)))
+    for name in counts:
+        if name not in KNOWN_COUNTS[card_number]:
+            mismatches.append((name, 0, counts[name]))
+    return mismatches
+
+
+def main():
+    """
+    Counts every hand from the command line options and prints the
+    counts, the time taken and any count that is wrong. Exits with
+    a status of 1 if any count is wrong
+    """
+    parser = argparse.ArgumentParser(
+        description='Evaluate every possible hand and check the counts'
+    )
+    parser.add_argument(
+        '--cards', type=int, default=5, choices=sorted(KNOWN_COUNTS),
+        help='the number of cards in each hand (default: 5)'
+    )
+    parser.add_argument(
+        '--workers', type=int,
+        help='the number of processes to use (default: one per CPU)'
+    )
+    parser.add_argument(
+        '--strength', action='store_true',
+        help='count the strength of each hand instead of its value '
+        'dictionary, which is faster'
+    )
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = count_hands(
+        arguments.cards, arguments.workers, arguments.strength
+    )
+    seconds = time.perf_counter() - start
+    total = sum(counts.values())
+    for name in reversed(HAND_NAMES[1:]):
+        if name in counts:
+            print(f'{name:<16}{counts[name]:>12}')
+    print(f'{"Total":<16}{total:>12}')
+    print(f'\n{seconds:.1f} seconds, {total / seconds:,.0f} hands per second')
+    mismatches = check_counts(counts, arguments.cards)
+    for name, known_count, count in mismatches:
+        print(f'{name}: expected {known_count}, found {count}')
+    if mismatches:
+        sys.exit(1)
+    print('Every count matches the known counts')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+"""
+Finds each player's chance of winning, drawing or losing, either
+by dealing the unknown cards at random many times over, or by
+trying every way the unknown cards could be dealt
+"""
+import random
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from itertools import combinations
+from os import cpu_count
+
+from .cards import CARDS
+from .evaluator import get_hand_strength
+
+# Trials are split into chunks of this size, each with its own random
+# number generator, so the results only depend on the seed and not on
+# how many processes share the work
+CHUNK_SIZE = 2000
+# Each process used for exact equity gets this many pieces of work,
+# so a process that finishes early can take on another piece
+PIECES_PER_WORKER = 4
+
+# The completions of each hand, shared with the processes that count
+# exact equity when they start
+deal_tables = []
+
+
+def estimate_equity(
+    hands, card_number, wildcards=(), opponents=0, trials=10000,
+    seed=None, workers=None, deck_cards=None
+):
+    """
+    Returns the chance of each hand winning, drawing and losing
+    as a list of dictionaries with the keys 'win', 'tie' and 'lose'.
+    Hands with less than card_number cards are filled with random
+    cards, and each opponent is dealt card_number random cards.
+    deck_cards is the list of cards that can be dealt, which is
+    every card not in a hand if not given
+    """
+    if len(hands) == 0:
+        raise ValueError('At least 1 hand is needed')
+    if trials < 1:
+        raise ValueError('At least 1 trial is needed')
+    if not 5 <= card_number <= 8:
+        raise ValueError('Hands must have from 5 to 8 cards')
+    deck_cards = get_deck_cards(hands, card_number, opponents, deck_cards)
+    if seed is None:
+        seed = random.getrandbits(64)
+    chunks = []
+    for start in range(0, trials, CHUNK_SIZE):
+        chunks.append((
+            [[int(card) for card in hand] for hand in hands], card_number,
+            tuple(wildcards), opponents, deck_cards, seed,
+            start // CHUNK_SIZE, min(CHUNK_SIZE, trials - start)
+        ))
+    if workers == 1 or len(chunks) <= 1:
+        results = [run_trials(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(run_trials, *zip(*chunks)))
+    return get_chances(results, len(hands), trials)
+
+
+def get_deck_cards(hands, card_number, opponents, deck_cards):
+    """
+    Returns the cards that can be dealt to fill the hands, raising
+    a ValueError if there are not enough of them
+    """
+    known_cards = set()
+    for hand in hands:
+        if len(hand) > card_number:
+            raise ValueError(f'Hands can only have {card_number} cards')
+        known_cards.update(int(card) for card in hand)
+    if deck_cards is None:
+        deck_cards = CARDS
+    deck_cards = [int(card) for card in deck_cards]
+    deck_cards = [card for card in deck_cards if card not in known_cards]
+    needed = opponents * card_number
+    for hand in hands:
+        needed += card_number - len(hand)
+    if needed > len(deck_cards):
+        raise ValueError('Not enough cards in the deck for every hand')
+    return deck_cards
+
+
+def run_trials(
+    hands, card_number, wildcards, opponents, deck_cards, seed,
+    chunk_index, trials
+):
+    """
+    Deals the unknown cards at random a number of times, and returns
+    how many times each hand won, drew and lost
+    """
+    rng = random.Random(f'{seed}:{chunk_index}')
+    missing = [card_number - len(hand) for hand in hands]
+    needed = sum(missing) + opponents * card_number
+    results = [[0, 0, 0] for hand in hands]
+    for trial in range(trials):
+        dealt = rng.sample(deck_cards, needed)
+        position = 0
+        strengths = []
+        for hand, amount in zip(hands, missing):
+            strengths.append(get_hand_strength(
+                hand + dealt[position:position + amount], wildcards
+            ))
+            position += amount
+        best_strength = max(strengths)
+        winners = strengths.count(best_strength)
+        for opponent in range(opponents):
+            strength = get_hand_strength(
+                dealt[position:position + card_number], wildcards
+            )
+            position += card_number
+            if strength > best_strength:
+                best_strength = strength
+                winners = 1
+            elif strength == best_strength:
+                winners += 1
+        for index, strength in enumerate(strengths):
+            if strength < best_strength:
+                results[index][2] += 1
+            elif winners == 1:
+                results[index][0] += 1
+            else:
+                results[index][1] += 1
+    return results
+
+
+def get_chances(results, hand_count, trials):
+    """
+    Adds up the results of each chunk of trials, and returns
+    them as chances from 0 to 1
+    """
+    totals = [[0, 0, 0] for index in range(hand_count)]
+    for chunk_results in results:
+        for total, result in zip(totals, chunk_results):
+            for index in range(3):
+                total[index] += result[index]
+    chances = []
+    for win, tie, lose in totals:
+        chances.append({
+            'win': win / trials,
+            'tie': tie / trials,
+            'lose': lose / trials
+        })
+    return chances
+
+
+def calculate_equity(
+    hands, card_number, wildcards=(), opponents=0, workers=None,
+    deck_cards=None
+):
+    """
+    Returns the exact chance of each hand winning, drawing and losing,
+    as a list of dictionaries of Fractions with the keys 'win', 'tie'
+    and 'lose', by trying every way the missing cards and opponents'
+    cards can be dealt. This is only practical when few cards are
+    missing, as the number of deals grows very quickly
+    """
+    if len(hands) == 0:
+        raise ValueError('At least 1 hand is needed')
+    if not 5 <= card_number <= 8:
+        raise ValueError('Hands must have from 5 to 8 cards')
+    deck_cards = get_deck_cards(hands, card_number, opponents, deck_cards)
+    tables = [
+        get_deal_table(
+            [int(card) for card in hand], card_number, wildcards, deck_cards
+        )
+        for hand in hands
+    ]
+    if opponents > 0:
+        # Every opponent starts without any cards, so they all share
+        # the same table
+        opponent_table = get_deal_table([], card_number, wildcards, deck_cards)
+        tables.extend([opponent_table] * opponents)
+    # The first table is split up between processes
+    first_table = tables[0]
+    piece_count = 1
+    if workers != 1:
+        piece_count = (workers or cpu_count() or 1) * PIECES_PER_WORKER
+    piece_size = -(-len(first_table) // piece_count)
+    pieces = [
+        (start, start + piece_size)
+        for start in range(0, len(first_table), piece_size)
+    ]
+    if workers == 1 or len(pieces) <= 1:
+        set_deal_tables(tables)
+        results = [count_deals(start, end) for start, end in pieces]
+    else:
+        with ProcessPoolExecutor(
+            workers, initializer=set_deal_tables, initargs=(tables,)
+        ) as executor:
+            results = list(executor.map(count_deals, *zip(*pieces)))
+    totals = [[0, 0, 0] for hand in hands]
+    for piece_results in results:
+        for total, result in zip(totals, piece_results):
+            for index in range(3):
+                total[index] += result[index]
+    deals = sum(totals[0])
+    chances = []
+    for win, tie, lose in totals:
+        chances.append({
+            'win': Fraction(win, deals),
+            'tie': Fraction(tie, deals),
+            'lose': Fraction(lose, deals)
+        })
+    return chances
+
+
+def get_deal_table(hand, card_number, wildcards, deck_cards):
+    """
+    Returns every way a hand can be completed from the deck, as a
+    list of the bits of the cards dealt to it and the strength of
+    the completed hand
+    """
+    table = []
+    for dealt in combinations(deck_cards, card_number - len(hand)):
+        card_bits = 0
+        for card in dealt:
+            card_bits |= 1 << card
+        strength = get_hand_strength(hand + list(dealt), wildcards)
+        table.append((card_bits, strength))
+    return table
+
+
+def set_deal_tables(tables):
+    """
+    Stores the completions of each hand for count_deals
+    """
+    global deal_tables
+    deal_tables = tables
+
+
+def count_deals(start, end):
+    """
+    Counts how many times each hand wins, draws and loses across
+    every deal that starts with the completions start to end of
+    the first hand. Only the hands given by the user are counted,
+    and not their opponents
+    """
+    tables = deal_tables
+    last = len(tables) - 1
+    strengths = [0] * len(tables)
+    results = [[0, 0, 0] for table in tables]
+
+    def deal(depth, used_bits):
+        """
+        Tries every completion of the hand at depth that doesn't
+        use any cards already dealt to the hands before it
+        """
+        for card_bits, strength in tables[depth]:
+            if card_bits & used_bits:
+                continue
+            strengths[depth] = strength
+            if depth < last:
+                deal(depth + 1, used_bits | card_bits)
+                continue
+            best_strength = max(strengths)
+            winners = strengths.count(best_strength)
+            for index in range(last + 1):
+                if strengths[index] < best_strength:
+                    results[index][2] += 1
+                elif winners == 1:
+                    results[index][0] += 1
+                else:
+                    results[index][1] += 1
+
+    for card_bits, strength in tables[0][start:end]:
+        strengths[0] = strength
+        if last == 0:
+            results[0][0] += 1
+        else:
+            deal(1, card_bits)
+    return results
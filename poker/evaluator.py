@@ -0,0 +1,573 @@
+"""
+Headless poker hand evaluation. Nothing in this module reads
+global game state or asks the user for input, so it can be
+imported and called from any process
+"""
+import heapq
+from functools import lru_cache
+from itertools import count, groupby
+
+from .cards import CARD_RANKS, CARD_SUITS, SUIT_INDEXES, SUITS, get_card_id
+from .tables import (
+    FLUSH, FLUSHES, FULL_HOUSE, HAND_NAMES, HIGH_CARD,
+    MAX_STRAIGHT_WILDCARDS, PRODUCTS, STRAIGHT_HIGHS, TWO_PAIR,
+    UNIQUE_RANKS, get_straight_ranks, get_strength, get_strength5,
+    pack_strength, unpack_strength
+)
+
+# How many different hands with wild cards are remembered
+WILDCARD_CACHE_SIZE = 65536
+
+
+def evaluate(cards, wildcards=()):
+    """
+    Returns the value of a poker hand as a dictionary.
+    cards is a list of card integers (or Card instances), and
+    wildcards is a list of ranks that are wild for this evaluation
+    Example: evaluate([Card(14, 'Hearts'), Card(14, 'Spades'), ...], [2])
+    """
+    # Cards without any wild cards can be looked up directly
+    if not has_wildcards(cards, wildcards):
+        return get_table_value(cards)
+    real_cards = [card for card in cards if CARD_RANKS[card] not in wildcards]
+    return resolve_wildcards(real_cards, len(cards) - len(real_cards))
+
+
+def get_hand_strength(cards, wildcards=()):
+    """
+    Returns the strength of a poker hand: a single integer that is
+    higher for better hands and equal for hands that draw, so hands
+    can be compared, sorted or ranked without their value dictionary
+    """
+    if not has_wildcards(cards, wildcards):
+        if len(cards) == 5:
+            return get_strength5(cards)
+        return get_strength(cards)
+    return evaluate(cards, wildcards)['strength']
+
+
+def has_wildcards(cards, wildcards):
+    """
+    Returns if any of the given cards are wild
+    """
+    if len(wildcards) == 0:
+        return False
+    for card in cards:
+        if CARD_RANKS[card] in wildcards:
+            return True
+    return False
+
+
+def get_table_value(cards):
+    """
+    Returns the value of 5 to 8 cards that are not wild, using
+    the precomputed tables
+    """
+    if len(cards) == 5:
+        strength = get_strength5(cards)
+    else:
+        strength = get_strength(cards)
+    value = dict(STRENGTH_VALUES[strength])
+    # Shared values are copied like cached wild card values, and
+    # the suit of a Flush is not part of its strength
+    if value['score'] == FLUSH:
+        suit_counts = [0, 0, 0, 0]
+        for card in cards:
+            suit_counts[CARD_SUITS[card]] += 1
+        value['subscore'] = SUITS[suit_counts.index(max(suit_counts))]
+    elif isinstance(value['subscore'], list):
+        value['subscore'] = value['subscore'].copy()
+    return value
+
+
+def get_strength_value(strength):
+    """
+    Returns the value dictionary of a strength made by cards that
+    are not wild. The subscore of a Flush is left as None, as it
+    is the suit of the cards
+    """
+    score, ranks = unpack_strength(strength)
+    # The ranks of a strength start with the most important
+    subscore = ranks[0]
+    if score == FULL_HOUSE:
+        subscore = [ranks[0], ranks[3]]
+    elif score == TWO_PAIR:
+        subscore = [ranks[0], ranks[2]]
+    elif score == FLUSH:
+        subscore = None
+    elif score == HIGH_CARD:
+        subscore = 0
+    value = create_value_dict(HAND_NAMES[score], subscore)
+    value['strength'] = strength
+    return value
+
+
+def build_strength_values():
+    """
+    Returns the value dictionary of every strength in the 5 card
+    tables, which are the only strengths cards without wild cards
+    can have
+    """
+    strengths = set(FLUSHES) | set(UNIQUE_RANKS) | set(PRODUCTS.values())
+    # Rank bits that aren't 5 different ranks have no strength
+    strengths.discard(0)
+    return {
+        strength: get_strength_value(strength) for strength in strengths
+    }
+
+
+def resolve_wildcards(cards, wildcards):
+    """
+    Returns the best value that a number of wild cards can make
+    alongside the cards that are not wild
+    """
+    # Suits are only names, so hands that are the same apart from
+    # their suits share one evaluation. The suits are put in order
+    # of their rank bits, and swapped back once it is evaluated
+    suit_bits = [0, 0, 0, 0]
+    for card in cards:
+        suit_bits[CARD_SUITS[card]] |= 1 << CARD_RANKS[card]
+    suit_order = sorted(range(4), key=suit_bits.__getitem__, reverse=True)
+    value = dict(get_wildcard_value(
+        tuple(suit_bits[suit] for suit in suit_order), wildcards
+    ))
+    # Cached values are shared, so their lists are copied
+    if isinstance(value['subscore'], list):
+        value['subscore'] = value['subscore'].copy()
+    if value['name'] == 'Flush':
+        suit = suit_order[SUIT_INDEXES[value['subscore']]]
+        value['subscore'] = SUITS[suit]
+    return value
+
+
+@lru_cache(maxsize=WILDCARD_CACHE_SIZE)
+def get_wildcard_value(suit_bits, wildcards):
+    """
+    Returns the value of a hand with wild cards, given the rank
+    bits of its other cards in each suit. The value is remembered,
+    so the same hand is only evaluated once
+    """
+    cards = []
+    for suit in range(4):
+        for rank in range(14, 1, -1):
+            if suit_bits[suit] >> rank & 1:
+                cards.append(get_card_id(rank, suit))
+    return HandEvaluation(cards, wildcards).get_value()
+
+
+class HandEvaluation:
+    """
+    Holds the state of a single hand evaluation, and can
+    calculate the best value a number of wild cards can make
+    alongside the cards that are not wild
+    """
+    def __init__(self, cards, wildcards):
+        """
+        Creates an instance of HandEvaluation
+        """
+        self.cards = cards
+        self.cards_sorted = []
+        # How many cards there are of each rank from 2 to Ace, how
+        # many of each suit, and the ranks in the hand and in each
+        # suit as bits with 2 as the lowest bit. Filled in by
+        # format_hand
+        self.rank_counts = []
+        self.suit_counts = []
+        self.rank_mask = 0
+        self.suit_masks = []
+        self.wildcards = wildcards
+        # Used to store cards that wild cards are imitating
+        self.fake_cards = []
+        self.value = {}
+
+    def format_hand(self):
+        """
+        Counts the ranks and suits of the hand in a single pass,
+        and updates the cards_sorted value of this hand, sorting
+        the cards in descending order
+        """
+        self.rank_counts = [0] * 13
+        self.suit_counts = [0, 0, 0, 0]
+        self.rank_mask = 0
+        self.suit_masks = [0, 0, 0, 0]
+        for card in self.cards:
+            rank = CARD_RANKS[card] - 2
+            suit = CARD_SUITS[card]
+            self.rank_counts[rank] += 1
+            self.suit_counts[suit] += 1
+            self.rank_mask |= 1 << rank
+            self.suit_masks[suit] |= 1 << rank
+        self.cards_sorted = self.sort(self.cards)
+
+    def sort(self, hand_list):
+        """
+        Sorts a given hand by its rank in descending order
+        """
+        # Cards of the same rank keep the order they were given in
+        return sorted(hand_list, key=CARD_RANKS.__getitem__, reverse=True)
+
+    def add_fake_card(self, rank, suit=0):
+        """
+        Adds a card that a wild card is imitating to the
+        hand. Only the rank matters, unless the fake card
+        completes a flush
+        """
+        self.fake_cards.append(get_card_id(rank, suit))
+
+    def combine_all_cards(self):
+        """
+        Returns a sorted list of all real and fake cards
+        within this hand
+        """
+        new_cards = self.cards_sorted.copy()
+        new_cards.extend(self.fake_cards)
+        # For Flushes, only cards of the same suit matter
+        if self.value['name'] == 'Flush':
+            new_cards = self.get_suit_only(
+                new_cards, self.value['subscore']
+            )
+        new_cards = self.sort(new_cards)
+        return new_cards
+
+    def get_suit_only(self, cards, suit):
+        """
+        Returns a hand that only contains a given suit
+        """
+        suit_index = SUIT_INDEXES[suit]
+        new_cards = []
+        for card in cards:
+            if CARD_SUITS[card] == suit_index:
+                new_cards.append(card)
+        return new_cards
+
+    def get_value(self):
+        """
+        Returns the value of the hand, along with its strength
+        """
+        self.value = self.get_hand_value()
+        self.value['strength'] = self.get_strength()
+        return self.value
+
+    def get_strength(self):
+        """
+        Returns the strength of the hand's value, made from the
+        ranks of the best 5 real and fake cards
+        """
+        name = self.value['name']
+        score = self.value['score']
+        subscore = self.value['subscore']
+        ranks = [CARD_RANKS[card] for card in self.combine_all_cards()]
+        # Straights are only decided by their highest card
+        if name in ('Straight', 'Straight Flush', 'Royal Flush'):
+            return pack_strength(score, range(subscore, subscore - 5, -1))
+        if name in ('Flush', 'High Card'):
+            return pack_strength(score, ranks[:5])
+        # The ranks that make up the value come first
+        if name == '5 of a Kind':
+            tie_ranks = [subscore] * 5
+        elif name == '4 of a Kind':
+            tie_ranks = [subscore] * 4
+        elif name == 'Full House':
+            tie_ranks = [subscore[0]] * 3 + [subscore[1]] * 2
+        elif name == 'Two Pair':
+            tie_ranks = [subscore[0]] * 2 + [subscore[1]] * 2
+        elif name == '3 of a Kind':
+            tie_ranks = [subscore] * 3
+        else:
+            tie_ranks = [subscore] * 2
+        # Then the highest of the other cards
+        for rank in ranks:
+            if len(tie_ranks) == 5:
+                break
+            if rank not in tie_ranks:
+                tie_ranks.append(rank)
+        return pack_strength(score, tie_ranks)
+
+    def get_hand_value(self):
+        """
+        Checks if the hand has a certain card combination,
+        starting with the highest value and working its way
+        down until a match is found
+        """
+        self.format_hand()
+
+        current_kind = None
+        # If all the cards in the hand are wild, set them all to Ace
+        if len(self.cards_sorted) == 0:
+            current_kind = 14
+            for i in range(self.wildcards):
+                self.add_fake_card(current_kind)
+        # If the hand has 5 cards of the same rank
+        else:
+            current_kind = self.is_of_kind(5)
+        if current_kind is not None:
+            return create_value_dict('5 of a Kind', current_kind)
+        # If the hand has 5 consecutive ranking cards of the same suit
+        straight_high = self.is_straight_flush()
+        if straight_high is not None:
+            name = 'Straight Flush'
+            # Rank 14 = Ace
+            if straight_high == 14:
+                name = 'Royal Flush'
+            return create_value_dict(name, straight_high)
+        # If the hand has 4 cards of the same rank
+        current_kind = self.is_of_kind(4)
+        if current_kind is not None:
+            return create_value_dict('4 of a Kind', current_kind)
+        # If the hand has 3 cards of the same rank and
+        # a pair of a different rank
+        house_ranks = self.is_full_house()
+        if house_ranks is not None:
+            return create_value_dict('Full House', house_ranks)
+        # If the hand has 5 cards of the same suit
+        flush_suit = self.is_flush()
+        if flush_suit is not None:
+            return create_value_dict('Flush', flush_suit)
+        # If the hand has 5 consecutive ranking cards
+        straight_high = self.is_straight(self.rank_mask)
+        if straight_high is not None:
+            return create_value_dict('Straight', straight_high)
+        # If the hand has 3 cards of the same rank
+        current_kind = self.is_of_kind(3)
+        if current_kind is not None:
+            return create_value_dict('3 of a Kind', current_kind)
+        # If the hand has 2 pairs of cards of the same rank
+        pair_groups = self.count_repeating_values(2)
+        if len(pair_groups) >= 2:
+            return create_value_dict('Two Pair', pair_groups)
+        # If the hand has 2 cards of the same rank
+        current_kind = self.is_of_kind(2)
+        if current_kind is not None:
+            return create_value_dict('Pair', current_kind)
+        # For everything else
+        return create_value_dict('High Card', 0)
+
+    def is_of_kind(self, number):
+        """
+        Returns if the hand has has a certain number
+        of matching card ranks, and returns that rank
+        """
+        self.fake_cards.clear()
+        # The highest rank that the wild cards can complete. If there
+        # are enough wild cards to make every card, they are all Aces
+        for rank in range(12, -1, -1):
+            amount = self.rank_counts[rank]
+            if amount + self.wildcards < number:
+                continue
+            if amount == 0 and self.wildcards < number:
+                continue
+            for i in range(amount, number):
+                self.add_fake_card(rank + 2)
+            return rank + 2
+        return None
+
+    def is_flush(self):
+        """
+        Evaluates if the hand has 5 cards of the same suit,
+        returns the suit if it does, and None if it doesn't
+        """
+        self.fake_cards.clear()
+        best_suit = None
+        best_ranks = []
+        for suit in range(4):
+            if self.suit_counts[suit] + self.wildcards < 5:
+                continue
+            # Wild cards are always best used as Aces
+            ranks = [14] * self.wildcards
+            ranks.extend(
+                rank + 2 for rank in range(12, -1, -1)
+                if self.suit_masks[suit] >> rank & 1
+            )
+            if ranks[:5] > best_ranks:
+                best_suit = suit
+                best_ranks = ranks[:5]
+        if best_suit is None:
+            return None
+        for i in range(min(self.wildcards, 5)):
+            self.add_fake_card(14, best_suit)
+        return SUITS[best_suit]
+
+    def count_repeating_values(self, number):
+        """
+        Returns the ranks that appear exactly number times in
+        the hand, highest first
+        """
+        return [
+            rank + 2 for rank in range(12, -1, -1)
+            if self.rank_counts[rank] == number
+        ]
+
+    def is_straight(self, rank_mask, suit=0):
+        """
+        Checks if 5 cards in a set of rank bits are ranked in
+        consecutive order, using wild cards to fill any gaps and,
+        if true, returns the highest card in the straight. Returns
+        None if false. Any fake cards are given the suit passed in
+        """
+        self.fake_cards.clear()
+        straight_wildcards = min(self.wildcards, MAX_STRAIGHT_WILDCARDS)
+        high_rank = STRAIGHT_HIGHS[straight_wildcards][rank_mask]
+        if high_rank == 0:
+            return None
+        for rank in get_straight_ranks(high_rank):
+            if not rank_mask >> (rank - 2) & 1:
+                self.add_fake_card(rank, suit)
+        return high_rank
+
+    def is_straight_flush(self):
+        """
+        Checks if 5 cards are ranked in consecutive order
+        and of the same suit. If true, returns the highest card
+        in the straight. Returns None if false
+        """
+        self.fake_cards.clear()
+        straight_wildcards = min(self.wildcards, MAX_STRAIGHT_WILDCARDS)
+        # Checking each suit for the highest straight
+        best_high = 0
+        best_suit = None
+        for suit in range(4):
+            high_rank = STRAIGHT_HIGHS[straight_wildcards][
+                self.suit_masks[suit]
+            ]
+            if high_rank > best_high:
+                best_high = high_rank
+                best_suit = suit
+        if best_suit is None:
+            return None
+        return self.is_straight(self.suit_masks[best_suit], best_suit)
+
+    def is_full_house(self):
+        """
+        Returns the ranks of the 3 of a Kind and the pair in the
+        best Full House the hand can make, or None if it can't
+        """
+        self.fake_cards.clear()
+        # Checking the highest ranks first, as the 3 of a Kind
+        # matters more than the pair
+        for three_rank in range(12, -1, -1):
+            three_amount = self.rank_counts[three_rank]
+            three_wild = max(0, 3 - three_amount)
+            if three_amount == 0 or three_wild > self.wildcards:
+                continue
+            for two_rank in range(12, -1, -1):
+                two_amount = self.rank_counts[two_rank]
+                if two_rank == three_rank or two_amount == 0:
+                    continue
+                two_wild = max(0, 2 - two_amount)
+                if three_wild + two_wild > self.wildcards:
+                    continue
+                for i in range(three_wild):
+                    self.add_fake_card(three_rank + 2)
+                for i in range(two_wild):
+                    self.add_fake_card(two_rank + 2)
+                return [three_rank + 2, two_rank + 2]
+        return None
+
+
+def create_value_dict(name, subscore):
+    """
+    Creates a dictionary containing all the information
+    about the value of the hand and returns it
+    """
+    value_info = {}
+    value_info['name'] = name
+    if name == 'High Card':
+        value_info['score'] = 1
+    elif name == 'Pair':
+        value_info['score'] = 2
+    elif name == 'Two Pair':
+        value_info['score'] = 3
+    elif name == '3 of a Kind':
+        value_info['score'] = 4
+    elif name == 'Straight':
+        value_info['score'] = 5
+    elif name == 'Flush':
+        value_info['score'] = 6
+    elif name == 'Full House':
+        value_info['score'] = 7
+    elif name == '4 of a Kind':
+        value_info['score'] = 8
+    elif name == 'Straight Flush':
+        value_info['score'] = 9
+    elif name == 'Royal Flush':
+        value_info['score'] = 10
+    elif name == '5 of a Kind':
+        value_info['score'] = 11
+    value_info['subscore'] = subscore
+    return value_info
+
+
+def get_best_hand(hands):
+    """
+    Returns the hand with the best value out of a
+    given list of hands. Each hand can be any object with
+    a value dictionary returned by evaluate()
+    """
+    best_hand = []
+    best_strength = 0
+    for hand in hands:
+        strength = hand.value['strength']
+        if strength > best_strength:
+            best_hand = [hand]
+            best_strength = strength
+        elif strength == best_strength:
+            best_hand.append(hand)
+        # We do nothing if the hand in the loop is less than the best
+    return best_hand
+
+
+def rank_hands(hands):
+    """
+    Returns every hand in a list grouped by their place, with the
+    winning hands first. Each place is a list of the hands that
+    drew with each other, in the order they were given
+    """
+    # Sorting is stable, so drawing hands keep their order
+    ranked = sorted(
+        hands, key=lambda hand: hand.value['strength'], reverse=True
+    )
+    return [
+        list(place) for strength, place in groupby(
+            ranked, key=lambda hand: hand.value['strength']
+        )
+    ]
+
+
+def get_top_hands(hands, number):
+    """
+    Returns the best number of hands out of any number of hands,
+    best first, keeping only that many of them at a time. Hands
+    can be any iterable, such as a generator that never ends, and
+    hands that draw are kept in the order they were given
+    """
+    if number < 1:
+        return []
+    # The worst kept hand is at the top of the heap. For drawing
+    # hands, the one given last is treated as worse
+    top_hands = []
+    order = count()
+    for hand in hands:
+        entry = (hand.value['strength'], -next(order), hand)
+        if len(top_hands) < number:
+            heapq.heappush(top_hands, entry)
+        elif entry[:2] > top_hands[0][:2]:
+            heapq.heapreplace(top_hands, entry)
+    top_hands.sort(key=lambda entry: entry[:2], reverse=True)
+    return [entry[2] for entry in top_hands]
+
+
+def compare_values(value1, value2):
+    """
+    Compares 2 hand values and returns a string
+    '<', '>' or '='
+    """
+    if value1['strength'] > value2['strength']:
+        return '>'
+    if value1['strength'] < value2['strength']:
+        return '<'
+    return '='
+
+
+# The value of every strength without wild cards, so looking up the
+# value of a hand only needs its strength
+STRENGTH_VALUES = build_strength_values()
@@ -0,0 +1,141 @@
+"""
+Reads poker hand history files, such as the ones written by
+PokerStars, one line at a time. Every hand that goes to a showdown
+is evaluated, and the winners the file recorded are checked against
+the winners found by the evaluator. Only the hand being read is kept
+in memory, so files of any size can be checked
+"""
+import re
+
+from .cards import parse_cards
+from .evaluator import evaluate, get_best_hand
+
+# The first line of each hand, such as "PokerStars Hand #123: ...",
+# which may start with a byte order mark at the start of a file
+HAND_START = re.compile(r'^\S.*?(?:Hand|Game) #(\d+)')
+SHOWS = re.compile(r'^(.+): shows \[([^\]]+)\]')
+# Cards shown in the summary by a player who lost the showdown
+MUCKED = re.compile(r'^Seat \d+: (.+?)(?: \([^)]*\))* mucked \[([^\]]+)\]')
+BOARD = re.compile(r'^Board \[([^\]]+)\]')
+# The winners of the main pot. Side pots are left out, as not every
+# player who showed their cards can win them
+COLLECTED = re.compile(r'^(.+) collected \S+ from (?:main )?pot')
+# Games that aren't won by the best 5 cards out of every card
+UNSUPPORTED_GAMES = ('Omaha', 'Hi/Lo', 'Razz', 'Lowball', 'Badugi', '2-7')
+
+
+class ShowdownHand:
+    """
+    The cards of a player in a showdown and their value
+    """
+    def __init__(self, name, cards):
+        """
+        Creates an instance of ShowdownHand
+        """
+        self.name = name
+        self.cards = cards
+        self.value = evaluate(cards)
+
+
+def read_histories(lines):
+    """
+    Yields each hand in the lines of a hand history file as a
+    dictionary with the keys 'id', 'game' (the first line of the
+    hand), 'shown' (the cards shown by each player), 'board' and
+    'winners' (the names recorded as winning the main pot)
+    """
+    history = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if 'Hand #' in line or 'Game #' in line:
+            start = HAND_START.match(line)
+            if start is not None:
+                if history is not None:
+                    yield history
+                history = {
+                    'id': start.group(1),
+                    'game': line,
+                    'shown': {},
+                    'board': '',
+                    'winners': []
+                }
+                continue
+        if history is None:
+            continue
+        # Checking for the text of each line before matching it,
+        # as most lines don't need to be read
+        if ': shows [' in line:
+            shows = SHOWS.match(line)
+            if shows is not None:
+                history['shown'][shows.group(1)] = shows.group(2)
+        elif ' mucked [' in line:
+            mucked = MUCKED.match(line)
+            if mucked is not None:
+                history['shown'][mucked.group(1)] = mucked.group(2)
+        elif line.startswith('Board ['):
+            board = BOARD.match(line)
+            if board is not None:
+                history['board'] = board.group(1)
+        elif ' collected ' in line:
+            collected = COLLECTED.match(line)
+            if collected is not None:
+                winner = collected.group(1)
+                if winner not in history['winners']:
+                    history['winners'].append(winner)
+    if history is not None:
+        yield history
+
+
+def check_showdown(history):
+    """
+    Returns the recorded and computed winners of a hand that went to a
+    showdown, along with the value of each hand shown, or None if the
+    hand had no showdown or can't be evaluated
+    """
+    if len(history['shown']) < 2 or len(history['winners']) == 0:
+        return None
+    for game in UNSUPPORTED_GAMES:
+        if game in history['game']:
+            return None
+    board = []
+    if history['board']:
+        board = parse_cards(history['board'])
+        if board is None:
+            return None
+    hands = []
+    for name, shown in history['shown'].items():
+        cards = parse_cards(shown)
+        if cards is None or not 5 <= len(cards) + len(board) <= 8:
+            return None
+        hands.append(ShowdownHand(name, cards + board))
+    computed = [hand.name for hand in get_best_hand(hands)]
+    return {
+        'id': history['id'],
+        'match': sorted(computed) == sorted(history['winners']),
+        'recorded': history['winners'],
+        'computed': computed,
+        'hands': {hand.name: hand.value['name'] for hand in hands}
+    }
+
+
+def audit_histories(lines, totals=None):
+    """
+    Yields the result of check_showdown for every showdown in the
+    lines of a hand history file. If totals is a dictionary, the
+    number of hands, showdowns and mismatches are added to it
+    """
+    if totals is None:
+        totals = {}
+    for key in ('hands', 'showdowns', 'mismatches'):
+        totals.setdefault(key, 0)
+    for history in read_histories(lines):
+        totals['hands'] += 1
+        result = check_showdown(history)
+        if result is None:
+            continue
+        totals['showdowns'] += 1
+        if not result['match']:
+            totals['mismatches'] += 1
+        yield result
@@ -0,0 +1,303 @@
+"""
+Precomputed chances of each of the 169 kinds of starting hand beating
+1 to 9 random opponents. A starting hand is the first 2 cards of a
+hand, and the rest of the cards are dealt at random. The table is
+made once by running this module, and is then memory mapped when the
+module is imported, so looking up a chance doesn't need any deals.
+Making the table needs NumPy to be installed, like poker/batch.py, but
+looking up a chance doesn't, so NumPy is only imported to make it
+
+    python3 -m poker.preflop --cards 5 --wild "" --wild "2"
+"""
+import argparse
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from .cards import (
+    CARD_RANKS, CARD_SUITS, RANK_LETTERS, get_card_id, get_rank_value
+)
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(__file__), 'preflop.bin')
+MAX_OPPONENTS = 9
+# The table starts with this header, followed by the wild ranks of
+# each wild card setting as rank bits, then the win and tie chances
+# of every setting, number of opponents and kind of starting hand
+TABLE_MAGIC = b'PPEQ'
+TABLE_VERSION = 1
+HEADER_FORMAT = '<4sBBBB'
+WILDCARD_FORMAT = '<H'
+ENTRY_FORMAT = '<HH'
+# Chances are stored as whole numbers out of this
+CHANCE_SCALE = 65535
+# The letter of each rank from Ace down to 2, in the order of the
+# rows and columns of the starting hand grid
+GRID_LETTERS = sorted(RANK_LETTERS, key=RANK_LETTERS.get, reverse=True)
+
+
+def get_starting_hand_name(index):
+    """
+    Returns the name of the starting hand at an index in the usual
+    13 by 13 grid, with pairs on the diagonal, suited hands above
+    it and offsuit hands below it
+    """
+    row, column = divmod(index, 13)
+    if row == column:
+        return GRID_LETTERS[row] * 2
+    if row < column:
+        return GRID_LETTERS[row] + GRID_LETTERS[column] + 's'
+    return GRID_LETTERS[column] + GRID_LETTERS[row] + 'o'
+
+
+def get_starting_hand_index(card1, card2):
+    """
+    Returns the index in STARTING_HANDS of two cards
+    """
+    high = max(CARD_RANKS[card1], CARD_RANKS[card2])
+    low = min(CARD_RANKS[card1], CARD_RANKS[card2])
+    if high == low or CARD_SUITS[card1] == CARD_SUITS[card2]:
+        return (14 - high) * 13 + 14 - low
+    return (14 - low) * 13 + 14 - high
+
+
+def get_starting_cards(index):
+    """
+    Returns two cards that make the starting hand at an index
+    """
+    row, column = divmod(index, 13)
+    rank1 = 14 - min(row, column)
+    rank2 = 14 - max(row, column)
+    # Suited hands share a suit, and every other hand doesn't
+    return [get_card_id(rank1, 0), get_card_id(rank2, int(row >= column))]
+
+
+def get_wildcard_bits(wildcards):
+    """
+    Returns the rank bits of a set of wild ranks
+    """
+    wildcard_bits = 0
+    for rank in wildcards:
+        wildcard_bits |= 1 << (rank - 2)
+    return wildcard_bits
+
+
+def get_max_opponents(card_number):
+    """
+    Returns the most opponents that can be dealt card_number
+    cards each along with the starting hand
+    """
+    return min(MAX_OPPONENTS, (50 - (card_number - 2)) // card_number)
+
+
+class PreflopTable:
+    """
+    A memory mapped table of starting hand chances
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as table_file:
+            self.data = mmap.mmap(
+                table_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        magic, version, self.card_number, self.max_opponents, settings = (
+            struct.unpack_from(HEADER_FORMAT, self.data)
+        )
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            raise ValueError(f'{path} is not a preflop table')
+        offset = struct.calcsize(HEADER_FORMAT)
+        wildcard_size = struct.calcsize(WILDCARD_FORMAT)
+        # The position of each wild card setting in the table
+        self.settings = {}
+        for setting in range(settings):
+            wildcard_bits = struct.unpack_from(
+                WILDCARD_FORMAT, self.data, offset
+            )[0]
+            self.settings[wildcard_bits] = setting
+            offset += wildcard_size
+        self.entries_offset = offset
+
+    def get_equity(self, cards, opponents, wildcards=(), card_number=None):
+        """
+        Returns the chance of a starting hand of 2 cards winning,
+        drawing and losing against a number of random opponents,
+        as a dictionary with the keys 'win', 'tie' and 'lose'.
+        Returns None if the table doesn't cover the situation
+        """
+        if card_number is not None and card_number != self.card_number:
+            return None
+        if len(cards) != 2 or not 1 <= opponents <= self.max_opponents:
+            return None
+        setting = self.settings.get(get_wildcard_bits(wildcards))
+        if setting is None:
+            return None
+        entry = (
+            (setting * self.max_opponents + opponents - 1) * 169 +
+            get_starting_hand_index(cards[0], cards[1])
+        )
+        win, tie = struct.unpack_from(
+            ENTRY_FORMAT, self.data,
+            self.entries_offset + entry * struct.calcsize(ENTRY_FORMAT)
+        )
+        win /= CHANCE_SCALE
+        tie /= CHANCE_SCALE
+        return {'win': win, 'tie': tie, 'lose': max(0.0, 1 - win - tie)}
+
+
+def load_preflop_table(path=DEFAULT_TABLE_PATH):
+    """
+    Returns the preflop table at a path, or None if there isn't one
+    """
+    if not os.path.exists(path):
+        return None
+    return PreflopTable(path)
+
+
+def get_preflop_equity(cards, opponents, wildcards=(), card_number=5):
+    """
+    Returns the chance of a starting hand winning, drawing and
+    losing from the table shipped with the package, or None if
+    the table doesn't cover the situation
+    """
+    if PREFLOP_TABLE is None:
+        return None
+    return PREFLOP_TABLE.get_equity(
+        cards, opponents, wildcards, card_number
+    )
+
+
+def generate_preflop_table(
+    path=DEFAULT_TABLE_PATH, card_number=5, wildcard_settings=((),),
+    trials=10000, seed=0, workers=None
+):
+    """
+    Works out the chances of every starting hand against 1 to 9
+    opponents for each set of wild ranks in wildcard_settings, and
+    writes them to a table at path. Each starting hand is worked out
+    in a separate process
+    """
+    import numpy as np
+
+    if not 5 <= card_number <= 8:
+        raise ValueError('Hands must have from 5 to 8 cards')
+    if trials < 1:
+        raise ValueError('At least 1 trial is needed')
+    max_opponents = get_max_opponents(card_number)
+    jobs = []
+    for setting, wildcards in enumerate(wildcard_settings):
+        for index in range(169):
+            jobs.append((
+                index, card_number, tuple(wildcards), max_opponents,
+                trials, seed, setting
+            ))
+    if workers == 1:
+        results = [get_starting_hand_results(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(
+                get_starting_hand_results, *zip(*jobs)
+            ))
+    # Ordering the results by setting, then opponents, then hand
+    entries = np.zeros(
+        (len(wildcard_settings), max_opponents, 169, 2), dtype=np.uint16
+    )
+    for job, result in zip(jobs, results):
+        entries[job[6], :, job[0]] = result
+    with open(path, 'wb') as table_file:
+        table_file.write(struct.pack(
+            HEADER_FORMAT, TABLE_MAGIC, TABLE_VERSION, card_number,
+            max_opponents, len(wildcard_settings)
+        ))
+        for wildcards in wildcard_settings:
+            table_file.write(struct.pack(
+                WILDCARD_FORMAT, get_wildcard_bits(wildcards)
+            ))
+        table_file.write(entries.astype('<u2').tobytes())
+
+
+def get_starting_hand_results(
+    index, card_number, wildcards, max_opponents, trials, seed, setting
+):
+    """
+    Returns the win and tie chances of a starting hand against 1 up
+    to max_opponents opponents, scaled by CHANCE_SCALE. Each trial
+    deals every opponent, and the chance against fewer opponents
+    only counts the first of them
+    """
+    import numpy as np
+
+    from .batch import BATCH_SIZE, deal_batch, evaluate_batch
+
+    hand = np.array(get_starting_cards(index), dtype=np.int64)
+    missing = card_number - 2
+    needed = missing + max_opponents * card_number
+    wins = np.zeros(max_opponents, dtype=np.int64)
+    ties = np.zeros(max_opponents, dtype=np.int64)
+    for start in range(0, trials, BATCH_SIZE):
+        size = min(BATCH_SIZE, trials - start)
+        rng = np.random.default_rng(
+            [seed, setting, index, start // BATCH_SIZE]
+        )
+        # The rest of the hand, followed by every opponent's hand
+        dealt = deal_batch(size, 1, needed, hand, rng)[:, 0]
+        strengths = evaluate_batch(
+            np.hstack([np.tile(hand, (size, 1)), dealt[:, :missing]]),
+            wildcards
+        )[0]
+        best_strengths = np.zeros(size, dtype=np.int64)
+        for opponent in range(max_opponents):
+            position = missing + opponent * card_number
+            best_strengths = np.maximum(best_strengths, evaluate_batch(
+                dealt[:, position:position + card_number], wildcards
+            )[0])
+            wins[opponent] += np.count_nonzero(strengths > best_strengths)
+            ties[opponent] += np.count_nonzero(strengths == best_strengths)
+    results = np.stack([wins, ties], axis=1) * CHANCE_SCALE / trials
+    return np.rint(results).astype(np.uint16)
+
+
+def main():
+    """
+    Makes a preflop table from the command line options
+    """
+    parser = argparse.ArgumentParser(
+        description='Make a table of starting hand chances'
+    )
+    parser.add_argument(
+        '--cards', type=int, default=5,
+        help='the number of cards in each hand (default: 5)'
+    )
+    parser.add_argument(
+        '--wild', action='append', metavar='RANKS',
+        help='a set of wild ranks to include, e.g. "2, Jack". Can be '
+        'given more than once, and "" is no wild cards (default: "")'
+    )
+    parser.add_argument(
+        '--trials', type=int, default=10000,
+        help='the number of random deals for each hand (default: 10000)'
+    )
+    parser.add_argument(
+        '--workers', type=int,
+        help='the number of processes to use (default: one per CPU)'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_TABLE_PATH)
+    arguments = parser.parse_args()
+    wildcard_settings = []
+    for wild_text in arguments.wild or ['']:
+        wildcard_settings.append(tuple(sorted({
+            get_rank_value(rank.strip().capitalize())
+            for rank in wild_text.split(',') if rank.strip()
+        })))
+    generate_preflop_table(
+        arguments.output, arguments.cards, wildcard_settings,
+        arguments.trials, arguments.seed, arguments.workers
+    )
+
+
+# The kinds of starting hand, in the order they are stored
+STARTING_HANDS = [get_starting_hand_name(index) for index in range(169)]
+# The table shipped with the package, if there is one
+PREFLOP_TABLE = load_preflop_table()
+
+if __name__ == '__main__':
+    main()
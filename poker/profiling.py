@@ -0,0 +1,246 @@
+"""
+Opt-in timing of each stage of hand evaluation. While profiling is
+enabled, the stages below are counted and timed separately for each
+shape of hand, such as 8 cards with 2 wild cards, so the hands that
+use the most time can be found. Profiling is enabled in two ways:
+
+- Setting the POKER_PROFILE environment variable before the poker
+package is imported, which prints a summary when the program exits
+- Evaluating hands inside a `with profile():` block
+
+Hands with wild cards are looked up in the cache of get_wildcard_value,
+and the HandEvaluation stages only run when a hand isn't in the cache.
+The cache lookup is timed as its own stage, get_wildcard_value, which
+covers every hand with wild cards whether it was in the cache or not.
+For each shape, its calls minus the calls of get_value are the hands
+found in the cache, and hands without wild cards only appear under
+evaluate. The cache is kept when profiling is enabled, so the summary
+matches how a running program spends its time
+
+While profiling is disabled, nothing is replaced, so hands are
+evaluated exactly as fast as they are without this module
+"""
+import atexit
+import os
+import sys
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from . import evaluator
+from .cards import CARD_RANKS
+from .evaluator import HandEvaluation
+
+# The methods of HandEvaluation that are timed. Stages that call
+# other stages, such as get_value, include the time of those stages
+EVALUATION_STAGES = [
+    'get_value', 'format_hand', 'is_of_kind', 'is_straight_flush',
+    'is_full_house', 'is_flush', 'is_straight', 'count_repeating_values'
+]
+# The functions in poker/evaluator.py that are timed
+FUNCTION_STAGES = ['evaluate', 'get_wildcard_value', 'get_best_hand']
+# The number of calls and nanoseconds of each stage, by stage and
+# shape of hand
+profile_stats = {}
+# The methods that have been replaced, with what they replaced
+replaced_methods = []
+# Each function that records its calls, with the function it calls
+timed_functions = {}
+
+
+def record_call(stage, shape, start):
+    """
+    Adds a call to a stage that started at start to profile_stats
+    """
+    duration = time.perf_counter_ns() - start
+    stats = profile_stats.get((stage, shape))
+    if stats is None:
+        profile_stats[(stage, shape)] = [1, duration]
+    else:
+        stats[0] += 1
+        stats[1] += duration
+
+
+def get_evaluation_shape(evaluation):
+    """
+    Returns the shape of the hand in a HandEvaluation
+    """
+    card_number = len(evaluation.cards) + evaluation.wildcards
+    return f'{card_number} cards, {evaluation.wildcards} wild'
+
+
+def get_call_shape(stage, arguments, keyword_arguments):
+    """
+    Returns the shape of the hand or hands passed to a function
+    """
+    if stage == 'evaluate':
+        cards = arguments[0]
+        wildcards = keyword_arguments.get('wildcards', ())
+        if len(arguments) > 1:
+            wildcards = arguments[1]
+        wild_number = sum(CARD_RANKS[card] in wildcards for card in cards)
+        return f'{len(cards)} cards, {wild_number} wild'
+    if stage == 'get_wildcard_value':
+        suit_bits, wildcards = arguments
+        card_number = wildcards
+        for bits in suit_bits:
+            card_number += bin(bits).count('1')
+        return f'{card_number} cards, {wildcards} wild'
+    # get_best_hand compares each hand with the best hand so far
+    try:
+        hand_number = len(arguments[0])
+    except TypeError:
+        return 'any number of hands'
+    if hand_number == 1:
+        return '1 hand'
+    return f'{hand_number} hands'
+
+
+def time_method(stage, method):
+    """
+    Returns a method of HandEvaluation that records each call to it
+    """
+    @wraps(method)
+    def timed_method(self, *arguments):
+        start = time.perf_counter_ns()
+        try:
+            return method(self, *arguments)
+        finally:
+            record_call(stage, get_evaluation_shape(self), start)
+    return timed_method
+
+
+def time_function(stage, function):
+    """
+    Returns a function that records each call to it
+    """
+    @wraps(function)
+    def timed_function(*arguments, **keyword_arguments):
+        start = time.perf_counter_ns()
+        try:
+            return function(*arguments, **keyword_arguments)
+        finally:
+            record_call(stage, get_call_shape(
+                stage, arguments, keyword_arguments
+            ), start)
+    # The cache of get_wildcard_value can still be cleared and read
+    for name in ('cache_clear', 'cache_info'):
+        if hasattr(function, name):
+            setattr(timed_function, name, getattr(function, name))
+    return timed_function
+
+
+def enable_profiling():
+    """
+    Replaces every stage with one that records its calls. Functions
+    are replaced in every module that has already imported them,
+    such as run.py importing evaluate from the poker package
+    """
+    if is_profiling():
+        return
+    for stage in EVALUATION_STAGES:
+        method = getattr(HandEvaluation, stage)
+        setattr(HandEvaluation, stage, time_method(stage, method))
+        replaced_methods.append((stage, method))
+    for stage in FUNCTION_STAGES:
+        function = getattr(evaluator, stage)
+        timed = time_function(stage, function)
+        timed_functions[timed] = function
+        for module in list(sys.modules.values()):
+            if getattr(module, stage, None) is function:
+                setattr(module, stage, timed)
+
+
+def disable_profiling():
+    """
+    Puts back every stage replaced by enable_profiling, including
+    in modules imported while profiling was enabled. The calls
+    recorded so far are kept
+    """
+    while replaced_methods:
+        stage, method = replaced_methods.pop()
+        setattr(HandEvaluation, stage, method)
+    for module in list(sys.modules.values()):
+        for stage in FUNCTION_STAGES:
+            function = getattr(module, stage, None)
+            if function in timed_functions:
+                setattr(module, stage, timed_functions[function])
+    timed_functions.clear()
+
+
+def is_profiling():
+    """
+    Returns if profiling is enabled
+    """
+    return len(replaced_methods) > 0
+
+
+@contextmanager
+def profile():
+    """
+    Records every stage called inside a with block, and disables
+    profiling again at the end of it unless it was already enabled.
+    The recorded calls can be read with get_profile_summary
+    """
+    was_enabled = is_profiling()
+    enable_profiling()
+    try:
+        yield profile_stats
+    finally:
+        if not was_enabled:
+            disable_profiling()
+
+
+def reset_profile():
+    """
+    Forgets every call recorded so far
+    """
+    profile_stats.clear()
+
+
+def get_profile_summary():
+    """
+    Returns a table of the calls and time of every stage, with the
+    stages that took the most time first. Under each stage are the
+    shapes of hand it was called with, also by the time they took
+    """
+    stage_totals = {}
+    for (stage, shape), (calls, duration) in profile_stats.items():
+        totals = stage_totals.setdefault(stage, [0, 0])
+        totals[0] += calls
+        totals[1] += duration
+    lines = [f'{"Stage":<34}{"Calls":>10}{"Total ms":>12}{"Mean us":>10}']
+    for stage, (calls, duration) in sorted(
+            stage_totals.items(), key=lambda item: -item[1][1]):
+        lines.append(get_summary_line(stage, calls, duration))
+        shapes = [
+            (shape, stats) for (shape_stage, shape), stats
+            in profile_stats.items() if shape_stage == stage
+        ]
+        shapes.sort(key=lambda item: -item[1][1])
+        for shape, (calls, duration) in shapes:
+            lines.append(get_summary_line(f'  {shape}', calls, duration))
+    return '\n'.join(lines)
+
+
+def get_summary_line(name, calls, duration):
+    """
+    Returns a single line of the profile summary
+    """
+    return (
+        f'{name:<34}{calls:>10}{duration / 1e6:>12.2f}'
+        f'{duration / calls / 1000:>10.2f}'
+    )
+
+
+def print_profile_summary():
+    """
+    Prints the profile summary, if any calls were recorded
+    """
+    if profile_stats:
+        print(get_profile_summary(), file=sys.stderr)
+
+
+if os.environ.get('POKER_PROFILE'):
+    enable_profiling()
+    atexit.register(print_profile_summary)
@@ -0,0 +1,142 @@
+"""
+Answers requests written as lines of JSON, so a program can keep one
+evaluator running and send it as many requests as it likes. Requests
+are answered in the order they arrive, so they can be sent without
+waiting for the answer to the previous one. Each request is an object
+with an "op" and an optional "id", which is copied to its answer:
+
+    {"id": 1, "op": "evaluate", "hand": "AsKsQsJsTs"}
+    {"id": 2, "op": "compare", "hands": {"Al": "AsKs9d4c2h", ...}}
+    {"id": 3, "op": "parse", "text": "Ah, 10d, Ks"}
+    {"id": 4, "op": "wild", "wild": "2, Jack"}
+
+Every answer has either a "result" or an "error"
+"""
+import json
+
+from .cards import parse_cards
+from .evaluator import evaluate
+from .stream import evaluate_record, get_named_hands, get_wild_ranks
+
+
+def serve(lines, write):
+    """
+    Answers each request in some lines of JSON, passing each answer
+    to write as a line of JSON. The wild cards set by a "wild" request
+    are used by every later request without its own
+    """
+    state = {'wild': []}
+    for line in lines:
+        if not line.strip():
+            continue
+        write(json.dumps(handle_line(line, state)) + '\n')
+
+
+def handle_line(line, state):
+    """
+    Returns the answer to a single line of JSON
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as error:
+        return {'id': None, 'error': f'Invalid JSON: {error}'}
+    if not isinstance(request, dict):
+        return {'id': None, 'error': 'Requests must be objects'}
+    answer = {'id': request.get('id')}
+    operation = OPERATIONS.get(request.get('op'))
+    if operation is None:
+        answer['error'] = f'Unknown op: {request.get("op")}'
+        return answer
+    try:
+        answer['result'] = operation(request, state)
+    except KeyError as error:
+        answer['error'] = f'Missing {error}'
+    except (ValueError, TypeError) as error:
+        answer['error'] = str(error)
+    return answer
+
+
+def get_request_wild(request, state):
+    """
+    Returns the wild ranks of a request, or the ones that were
+    last set if it has none
+    """
+    if request.get('wild') is not None:
+        return get_wild_ranks(request['wild'])
+    return state['wild']
+
+
+def get_request_cards(text):
+    """
+    Returns the cards in a hand given as text or a list of cards,
+    raising a ValueError if they can't be read
+    """
+    if isinstance(text, list):
+        text = ','.join(text)
+    cards = parse_cards(str(text))
+    if cards is None:
+        raise ValueError(f'Invalid cards: "{text}"')
+    return cards
+
+
+def evaluate_request(request, state):
+    """
+    Returns the value of a "hand", or a list of values for "hands"
+    """
+    wildcards = get_request_wild(request, state)
+    if 'hands' in request:
+        hands = [get_request_cards(hand) for hand in request['hands']]
+    else:
+        hands = [get_request_cards(request['hand'])]
+    values = []
+    for cards in hands:
+        if not 5 <= len(cards) <= 8:
+            raise ValueError('Hands must have from 5 to 8 cards')
+        if len(set(cards)) < len(cards):
+            raise ValueError('A hand cannot contain the same card twice')
+        values.append(evaluate(cards, wildcards))
+    if 'hands' in request:
+        return values
+    return values[0]
+
+
+def compare_request(request, state):
+    """
+    Returns the value of each of the "hands" and the winners, which
+    can be a list of hands or an object of hands by name
+    """
+    result = evaluate_record({
+        'id': request.get('id'),
+        'hands': get_named_hands(request['hands']),
+        'wild': None
+    }, get_request_wild(request, state))
+    if 'error' in result:
+        raise ValueError(result['error'])
+    return {'hands': result['hands'], 'winners': result['winners']}
+
+
+def parse_request(request, state):
+    """
+    Returns the rank and suit of each card in some "text"
+    """
+    cards = get_request_cards(request['text'])
+    return [
+        {'card': int(card), 'rank': card.rank, 'suit': card.suit}
+        for card in cards
+    ]
+
+
+def wild_request(request, state):
+    """
+    Sets the wild ranks used by later requests, and returns them
+    """
+    state['wild'] = get_wild_ranks(request.get('wild') or [])
+    return state['wild']
+
+
+OPERATIONS = {
+    'evaluate': evaluate_request,
+    'compare': compare_request,
+    'parse': parse_request,
+    'wild': wild_request
+}
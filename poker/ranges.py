@@ -0,0 +1,260 @@
+"""
+Reads ranges of starting cards written in the usual poker notation,
+such as "AKs, TT+, 76s-54s", and finds the chance of one range
+beating another. Each hand in a range starts with 2 known cards,
+and the rest of its cards are dealt at random. Like poker/batch.py,
+this module needs NumPy to be installed
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from .batch import BATCH_SIZE, deal_batch, evaluate_batch
+from .cards import RANK_LETTERS, SUITS, get_card_id
+
+# The letters used for suits in range notation
+SUIT_LETTERS = {suit[0].lower(): suit for suit in SUITS}
+# Range equity results are remembered for this many pairs of ranges
+RANGE_CACHE_SIZE = 1024
+
+
+def parse_range(range_text):
+    """
+    Returns the starting cards in a range as a list of
+    (card, card, weight) tuples, with the higher card first.
+    The range is a comma separated list of:
+    - Pairs: "TT", every pair from a pair upwards: "TT+", or
+    every pair between two pairs: "TT-77"
+    - Two ranks: "AK", only suited: "AKs" or only offsuit: "AKo",
+    raising the lower rank up to the higher one: "A5s+", or every
+    hand between two hands: "76s-54s", "KTo-K7o"
+    - A single set of cards: "AsKd"
+    Any of these can end in a weight from 0 to 1, such as "AKs:0.5",
+    to count its hands that much less often. Raises a ValueError
+    if the range can't be read
+    """
+    weights = {}
+    for part in range_text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        weight = 1.0
+        if ':' in part:
+            part, weight_text = part.split(':', 1)
+            part = part.strip()
+            try:
+                weight = float(weight_text)
+            except ValueError:
+                raise ValueError(f'"{weight_text}" is not a weight')
+            if not 0 <= weight <= 1:
+                raise ValueError('Weights must be from 0 to 1')
+        for combo in get_part_combos(part.replace('10', 'T')):
+            weights[combo] = weight
+    combos = [
+        (card1, card2, weight)
+        for (card1, card2), weight in weights.items() if weight > 0
+    ]
+    if len(combos) == 0:
+        raise ValueError(f'"{range_text}" has no hands in it')
+    return combos
+
+
+def get_part_combos(part):
+    """
+    Returns every pair of cards described by one part of a range
+    """
+    if len(part) == 4 and part[1].lower() in SUIT_LETTERS:
+        # A single set of cards, such as "AsKd"
+        cards = [get_part_card(part[:2]), get_part_card(part[2:])]
+        if cards[0] == cards[1]:
+            raise ValueError(f'"{part}" uses the same card twice')
+        return [tuple(sorted(cards, reverse=True))]
+    if part.endswith('+'):
+        first, kind = get_part_hand(part[:-1])
+        if first[0] == first[1]:
+            hands = [(rank, rank) for rank in range(first[0], 15)]
+        else:
+            hands = [(first[0], rank) for rank in range(first[1], first[0])]
+    elif '-' in part:
+        start_text, end_text = part.split('-', 1)
+        first, kind = get_part_hand(start_text)
+        last, last_kind = get_part_hand(end_text)
+        hands = get_hands_between(part, first, last)
+        if kind != last_kind:
+            raise ValueError(f'"{part}" mixes suited and offsuit hands')
+    else:
+        first, kind = get_part_hand(part)
+        hands = [first]
+    combos = []
+    for high, low in hands:
+        combos.extend(get_hand_combos(high, low, kind))
+    return combos
+
+
+def get_part_card(card_text):
+    """
+    Returns the integer of a card written as a rank and suit
+    letter, such as "As"
+    """
+    rank = RANK_LETTERS.get(card_text[0].upper())
+    suit = SUIT_LETTERS.get(card_text[1].lower())
+    if rank is None or suit is None:
+        raise ValueError(f'"{card_text}" is not a card')
+    return get_card_id(rank, suit)
+
+
+def get_part_hand(hand_text):
+    """
+    Returns the two ranks of a hand such as "AKs", higher rank
+    first, and whether it is suited ('s'), offsuit ('o') or
+    either ('')
+    """
+    kind = ''
+    if hand_text[-1:].lower() in ('s', 'o'):
+        kind = hand_text[-1].lower()
+        hand_text = hand_text[:-1]
+    ranks = [RANK_LETTERS.get(letter.upper()) for letter in hand_text]
+    if len(ranks) != 2 or None in ranks:
+        raise ValueError(f'"{hand_text}" is not a starting hand')
+    ranks.sort(reverse=True)
+    if ranks[0] == ranks[1] and kind:
+        raise ValueError('Pairs cannot be suited or offsuit')
+    return tuple(ranks), kind
+
+
+def get_hands_between(part, first, last):
+    """
+    Returns the hands from first to last in a part such as
+    "76s-54s", where both ranks move together, or "KTo-K7o",
+    where only the lower rank moves
+    """
+    if first[0] == first[1] and last[0] == last[1]:
+        low, high = sorted([first[0], last[0]])
+        return [(rank, rank) for rank in range(low, high + 1)]
+    gap = first[0] - first[1]
+    if first[0] == last[0] and first[0] != first[1]:
+        low, high = sorted([first[1], last[1]])
+        if high >= first[0]:
+            raise ValueError(f'"{part}" is not a range of hands')
+        return [(first[0], rank) for rank in range(low, high + 1)]
+    if gap > 0 and last[0] - last[1] == gap:
+        low, high = sorted([first[0], last[0]])
+        return [(rank, rank - gap) for rank in range(low, high + 1)]
+    raise ValueError(f'"{part}" is not a range of hands')
+
+
+def get_hand_combos(high, low, kind):
+    """
+    Returns every pair of cards with two ranks, keeping only
+    suited or offsuit pairs if kind is 's' or 'o'
+    """
+    combos = []
+    for suit1 in range(4):
+        for suit2 in range(4):
+            if high == low and suit2 <= suit1:
+                continue
+            if (kind == 's' and suit1 != suit2) or (
+                    kind == 'o' and suit1 == suit2):
+                continue
+            combos.append((
+                get_card_id(high, suit1), get_card_id(low, suit2)
+            ))
+    return combos
+
+
+def calculate_range_equity(
+    range1, range2, card_number=5, wildcards=(), dead_cards=(),
+    trials=100000, seed=0
+):
+    """
+    Returns the chance of a hand from each range winning, drawing
+    and losing against a hand from the other, as a list of two
+    dictionaries with the keys 'win', 'tie' and 'lose'. The ranges
+    can be text or lists from parse_range. Each trial picks a pair
+    of hands that don't share any cards, weighted by their weights,
+    and fills both hands up to card_number cards at random. Cards
+    in dead_cards are never dealt. The same ranges and seed always
+    give the same result, and results are remembered
+    """
+    if isinstance(range1, str):
+        range1 = parse_range(range1)
+    if isinstance(range2, str):
+        range2 = parse_range(range2)
+    if trials < 1:
+        raise ValueError('At least 1 trial is needed')
+    if not 5 <= card_number <= 8:
+        raise ValueError('Hands must have from 5 to 8 cards')
+    win, tie, lose = get_range_results(
+        tuple(range1), tuple(range2), card_number,
+        tuple(sorted(set(wildcards))),
+        tuple(sorted(int(card) for card in dead_cards)), trials, seed
+    )
+    return [
+        {'win': win, 'tie': tie, 'lose': lose},
+        {'win': lose, 'tie': tie, 'lose': win}
+    ]
+
+
+@lru_cache(maxsize=RANGE_CACHE_SIZE)
+def get_range_results(
+    range1, range2, card_number, wildcards, dead_cards, trials, seed
+):
+    """
+    Returns the chance of the first range winning, drawing and
+    losing. Every trial is evaluated as part of a NumPy batch
+    """
+    cards1, weights1 = get_range_arrays(range1, dead_cards)
+    cards2, weights2 = get_range_arrays(range2, dead_cards)
+    # Pairs of hands from each range that can be dealt together
+    card_bits1 = (1 << cards1).sum(axis=1)
+    card_bits2 = (1 << cards2).sum(axis=1)
+    pair_weights = np.outer(weights1, weights2)
+    pair_weights[(card_bits1[:, None] & card_bits2[None, :]) != 0] = 0
+    pair_weights = pair_weights.reshape(-1)
+    total_weight = pair_weights.sum()
+    if total_weight == 0:
+        raise ValueError('The ranges have no hands that can be dealt together')
+    cumulative_weights = np.cumsum(pair_weights) / total_weight
+
+    missing = card_number - 2
+    if 48 - len(dead_cards) < 2 * missing:
+        raise ValueError('Not enough cards in the deck for both hands')
+    results = np.zeros(3, dtype=np.int64)
+    for start in range(0, trials, BATCH_SIZE):
+        size = min(BATCH_SIZE, trials - start)
+        rng = np.random.default_rng([seed, start // BATCH_SIZE])
+        pairs = np.searchsorted(cumulative_weights, rng.random(size))
+        pairs = np.minimum(pairs, len(pair_weights) - 1)
+        hands1 = cards1[pairs // len(cards2)]
+        hands2 = cards2[pairs % len(cards2)]
+        # Dealing the rest of both hands around the dead cards and
+        # the starting hands of each trial
+        dealt = deal_batch(
+            size, 2, missing, dead_cards, rng, np.hstack([hands1, hands2])
+        )
+        strengths1 = evaluate_batch(
+            np.hstack([hands1, dealt[:, 0]]), wildcards
+        )[0]
+        strengths2 = evaluate_batch(
+            np.hstack([hands2, dealt[:, 1]]), wildcards
+        )[0]
+        results[0] += np.count_nonzero(strengths1 > strengths2)
+        results[1] += np.count_nonzero(strengths1 == strengths2)
+        results[2] += np.count_nonzero(strengths1 < strengths2)
+    return tuple((results / trials).tolist())
+
+
+def get_range_arrays(range_combos, dead_cards):
+    """
+    Returns the cards and weights of a range as NumPy arrays,
+    leaving out any hands that use dead cards
+    """
+    combos = [
+        combo for combo in range_combos
+        if combo[0] not in dead_cards and combo[1] not in dead_cards
+    ]
+    if len(combos) == 0:
+        raise ValueError('Every hand in a range uses a dead card')
+    cards = np.array([combo[:2] for combo in combos], dtype=np.int64)
+    weights = np.array([combo[2] for combo in combos], dtype=np.float64)
+    return cards, weights
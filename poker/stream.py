@@ -0,0 +1,229 @@
+"""
+Reads groups of hands from JSON lines or CSV and evaluates them one
+group at a time, so files of any size can be streamed through the
+evaluator. Groups can be shared between processes, keeping only a
+few of them in memory at once
+"""
+import csv
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from os import cpu_count
+
+from .cards import RANK_NAMES, RANK_TOKENS, get_rank_value, parse_cards
+from .evaluator import evaluate
+
+# Groups are sent to each process this many at a time
+STREAM_CHUNK_SIZE = 256
+# Each process has at most this many chunks waiting for it
+CHUNKS_PER_WORKER = 4
+
+
+def read_records(lines, file_format='auto'):
+    """
+    Yields each group of hands in some lines of JSON or CSV as a
+    dictionary with the keys 'id', 'hands' and 'wild', where hands
+    is a list of (name, cards) pairs. Lines that can't be read are
+    yielded with an 'error' instead of hands.
+
+    Each JSON line is an object with "hands", as a list of hands or
+    an object of hands by name, and optionally "id" and "wild".
+    CSV starts with a header row, and every column other than "id"
+    and "wild" is a hand named by its header
+    """
+    lines = iter(lines)
+    if file_format == 'auto':
+        first_lines = []
+        for line in lines:
+            first_lines.append(line)
+            if line.strip():
+                break
+        file_format = 'jsonl'
+        if first_lines and not first_lines[-1].lstrip().startswith('{'):
+            file_format = 'csv'
+        lines = chain_lines(first_lines, lines)
+    if file_format == 'csv':
+        yield from read_csv_records(lines)
+    else:
+        yield from read_json_records(lines)
+
+
+def chain_lines(first_lines, lines):
+    """
+    Yields the lines that were read to find the format of a file,
+    followed by the rest of its lines
+    """
+    yield from first_lines
+    yield from lines
+
+
+def read_json_records(lines):
+    """
+    Yields each group of hands in some JSON lines
+    """
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            hands = data['hands']
+        except (ValueError, TypeError, KeyError) as error:
+            yield {'id': line_number, 'error': f'Invalid line: {error}'}
+            continue
+        try:
+            hands = get_named_hands(hands)
+        except ValueError as error:
+            yield {'id': line_number, 'error': str(error)}
+            continue
+        yield {
+            'id': data.get('id', line_number),
+            'hands': hands,
+            'wild': data.get('wild')
+        }
+
+
+def get_named_hands(hands):
+    """
+    Returns hands given as a list or as an object of hands by name
+    as a list of (name, hand) pairs, naming hands in a list by their
+    position. Raises a ValueError if the hands are neither
+    """
+    if isinstance(hands, dict):
+        return list(hands.items())
+    if isinstance(hands, list):
+        return [
+            (f'Hand {index}', hand) for index, hand in enumerate(hands, 1)
+        ]
+    raise ValueError('Hands must be a list')
+
+
+def read_csv_records(lines):
+    """
+    Yields each group of hands in some lines of CSV
+    """
+    for line_number, row in enumerate(csv.DictReader(lines), 2):
+        hands = [
+            (name, text) for name, text in row.items()
+            if name not in ('id', 'wild') and text
+        ]
+        yield {
+            'id': row.get('id') or line_number,
+            'hands': hands,
+            'wild': row.get('wild') or None
+        }
+
+
+def get_wild_ranks(wild):
+    """
+    Returns the ranks in a list of wild cards, or in text such as
+    "2, Jack" or "2, J". Raises a ValueError if a rank isn't valid
+    """
+    if isinstance(wild, str):
+        wild = [rank for rank in wild.split(',') if rank.strip()]
+    elif not isinstance(wild, list):
+        raise ValueError('Wild cards must be a list or text')
+    ranks = []
+    for rank in wild:
+        if isinstance(rank, str):
+            rank = rank.strip()
+            if rank.lower() in RANK_TOKENS:
+                rank = RANK_TOKENS[rank.lower()]
+            elif rank.capitalize() in RANK_NAMES:
+                rank = get_rank_value(rank.capitalize())
+        if not isinstance(rank, int) or not 2 <= rank <= 14:
+            raise ValueError(f'"{rank}" is not a rank')
+        ranks.append(rank)
+    return ranks
+
+
+def evaluate_record(record, wildcards=()):
+    """
+    Returns the value of each hand in a group and the names of the
+    winning hands, as a dictionary that can be written as JSON.
+    The group's own wild cards are used instead of wildcards if it
+    has any
+    """
+    if 'error' in record:
+        return record
+    result = {'id': record['id']}
+    try:
+        if record['wild'] is not None:
+            wildcards = get_wild_ranks(record['wild'])
+        hands = []
+        seen_cards = set()
+        for name, text in record['hands']:
+            if isinstance(text, list):
+                for card in text:
+                    if not isinstance(card, str):
+                        raise ValueError(
+                            f'Invalid card in {name}: {json.dumps(card)}'
+                        )
+                text = ','.join(text)
+            cards = parse_cards(str(text))
+            if cards is None:
+                raise ValueError(f'Invalid cards in {name}: "{text}"')
+            if not 5 <= len(cards) <= 8:
+                raise ValueError(f'{name} must have from 5 to 8 cards')
+            card_set = set(cards)
+            if len(card_set) < len(cards) or seen_cards & card_set:
+                raise ValueError(f'{name} uses a card more than once')
+            seen_cards |= card_set
+            hands.append((name, cards))
+    except (ValueError, TypeError) as error:
+        result['error'] = str(error)
+        return result
+    if len(hands) == 0:
+        result['error'] = 'No hands found'
+        return result
+
+    result['hands'] = []
+    best_strength = 0
+    for name, cards in hands:
+        value = evaluate(cards, wildcards)
+        best_strength = max(best_strength, value['strength'])
+        result['hands'].append({
+            'name': name,
+            'value': value['name'],
+            'score': value['score'],
+            'strength': value['strength']
+        })
+    result['winners'] = [
+        hand['name'] for hand in result['hands']
+        if hand['strength'] == best_strength
+    ]
+    return result
+
+
+def evaluate_records(records, wildcards=()):
+    """
+    Returns the results of a list of groups
+    """
+    return [evaluate_record(record, wildcards) for record in records]
+
+
+def stream_results(records, wildcards=(), workers=1):
+    """
+    Yields the result of each group in the same order as the groups.
+    With more than one worker, chunks of groups are evaluated in
+    separate processes, and only a few chunks are read ahead
+    """
+    records = iter(records)
+    if workers == 1:
+        for record in records:
+            yield evaluate_record(record, wildcards)
+        return
+    with ProcessPoolExecutor(workers) as executor:
+        waiting = deque()
+        max_waiting = (workers or cpu_count() or 1) * CHUNKS_PER_WORKER
+        while True:
+            while len(waiting) < max_waiting:
+                chunk = list(islice(records, STREAM_CHUNK_SIZE))
+                if len(chunk) == 0:
+                    break
+                waiting.append(
+                    executor.submit(evaluate_records, chunk, wildcards)
+                )
+            if len(waiting) == 0:
+                break
+            yield from waiting.popleft().result()
@@ -0,0 +1,304 @@
+"""
+Precomputed tables for evaluating hands without wild cards.
+5 card hands use tables in the style of Cactus Kev's evaluator.
+Each card has a rank bit and a rank prime, so a hand can be looked
+up by the bits of its ranks (when every rank is different) or by the
+product of its primes (when some ranks repeat)
+
+Hands of 6 to 8 cards are read one card at a time, adding up a key
+for the ranks and the bits of the ranks in each suit. The best 5
+cards are then found with one lookup for the ranks and one for each
+suit, without trying every set of 5 cards in the hand
+
+Every lookup returns a strength: the score of the hand, followed by
+the ranks that break ties between hands of the same score, packed
+into a single integer that is higher for better hands
+
+Straights are found by looking up the rank bits of a hand in
+STRAIGHT_HIGHS, which holds the best straight of every set of rank
+bits for each number of wild cards that can fill its gaps. An Ace
+can end a straight (10 to Ace) or start one (Ace to 5)
+"""
+from itertools import combinations, combinations_with_replacement
+
+from .cards import CARD_RANKS, CARD_SUITS, RANKS
+
+# Scores are the same as the ones given by create_value_dict
+HIGH_CARD = 1
+PAIR = 2
+TWO_PAIR = 3
+THREE_OF_A_KIND = 4
+STRAIGHT = 5
+FLUSH = 6
+FULL_HOUSE = 7
+FOUR_OF_A_KIND = 8
+STRAIGHT_FLUSH = 9
+ROYAL_FLUSH = 10
+FIVE_OF_A_KIND = 11
+
+HAND_NAMES = [
+    '', 'High Card', 'Pair', 'Two Pair', '3 of a Kind', 'Straight',
+    'Flush', 'Full House', '4 of a Kind', 'Straight Flush',
+    'Royal Flush', '5 of a Kind'
+]
+
+# Each rank takes up 4 bits of a strength, with the score above them
+SCORE_SHIFT = 20
+
+PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+CARD_PRIMES = [PRIMES[rank - 2] for rank in CARD_RANKS]
+CARD_BITS = [1 << (rank - 2) for rank in CARD_RANKS]
+CARD_SUIT_BITS = [1 << suit for suit in CARD_SUITS]
+# Each rank is a digit of a base 5 number, counting how many
+# cards of that rank are in the hand
+CARD_RANK_KEYS = [5 ** (rank - 2) for rank in CARD_RANKS]
+
+# The rank bits of each straight by its highest rank, best first.
+# The lowest straight is Ace to 5, where the Ace is played as a 1
+STRAIGHT_BITS = {high: 0b11111 << (high - 6) for high in range(14, 5, -1)}
+STRAIGHT_BITS[5] = 0b1000000001111
+# With this many wild cards any set of ranks makes a straight
+MAX_STRAIGHT_WILDCARDS = 5
+
+
+def pack_strength(score, ranks):
+    """
+    Returns a hand strength made from its score and the 5 ranks
+    that decide ties, ordered from most to least important
+    """
+    strength = score
+    for rank in ranks:
+        strength = (strength << 4) | rank
+    return strength
+
+
+def unpack_strength(strength):
+    """
+    Returns the score and the 5 tie breaking ranks of a
+    hand strength
+    """
+    ranks = [(strength >> shift) & 15 for shift in (16, 12, 8, 4, 0)]
+    return strength >> SCORE_SHIFT, ranks
+
+
+def get_straight_ranks(high):
+    """
+    Returns the ranks of the straight with a given highest rank
+    """
+    return [
+        rank for rank in RANKS if STRAIGHT_BITS[high] >> (rank - 2) & 1
+    ]
+
+
+def build_straight_highs():
+    """
+    Returns a table of the highest rank of the best straight in
+    every set of rank bits, or 0 if there is none, for each number
+    of wild cards up to MAX_STRAIGHT_WILDCARDS
+    """
+    bit_counts = [bin(bits).count('1') for bits in range(8192)]
+    straight_highs = [[0] * 8192 for i in range(MAX_STRAIGHT_WILDCARDS + 1)]
+    for rank_bits in range(8192):
+        # Trying each straight, starting with the highest, and
+        # giving it to every number of wild cards that can fill
+        # its gaps but couldn't make a higher straight
+        least_wildcards = MAX_STRAIGHT_WILDCARDS + 1
+        for high, straight in STRAIGHT_BITS.items():
+            missing = bit_counts[straight & ~rank_bits]
+            if missing < least_wildcards:
+                for wildcards in range(missing, least_wildcards):
+                    straight_highs[wildcards][rank_bits] = high
+                if missing == 0:
+                    break
+                least_wildcards = missing
+    return straight_highs
+
+
+def get_rank_bits(ranks):
+    """
+    Returns the rank bits of a list of ranks
+    """
+    rank_bits = 0
+    for rank in ranks:
+        rank_bits |= 1 << (rank - 2)
+    return rank_bits
+
+
+def get_distinct_strength(ranks, flush):
+    """
+    Returns the strength of 5 cards that all have different ranks,
+    given in descending order
+    """
+    straight_high = STRAIGHT_HIGHS[0][get_rank_bits(ranks)]
+    if straight_high:
+        score = STRAIGHT
+        if flush:
+            score = ROYAL_FLUSH if straight_high == 14 else STRAIGHT_FLUSH
+        straight = range(straight_high, straight_high - 5, -1)
+        return pack_strength(score, straight)
+    return pack_strength(FLUSH if flush else HIGH_CARD, ranks)
+
+
+def get_repeated_strength(ranks):
+    """
+    Returns the strength of the best 5 cards out of a list of
+    ranks, ignoring flushes
+    """
+    # Groups of ranks, largest group first and then highest rank first
+    groups = sorted(
+        {rank: ranks.count(rank) for rank in ranks}.items(),
+        key=lambda group: (group[1], group[0]), reverse=True
+    )
+    amounts = [amount for rank, amount in groups] + [0]
+    if amounts[0] >= 4:
+        score = FOUR_OF_A_KIND
+        tie_ranks = [groups[0][0]] * 4
+    elif amounts[0] == 3 and amounts[1] >= 2:
+        # A second group of 3 can be used as the pair
+        score = FULL_HOUSE
+        tie_ranks = [groups[0][0]] * 3 + [max(
+            rank for rank, amount in groups[1:] if amount >= 2
+        )] * 2
+    else:
+        straight_high = STRAIGHT_HIGHS[0][get_rank_bits(ranks)]
+        if straight_high:
+            straight = range(straight_high, straight_high - 5, -1)
+            return pack_strength(STRAIGHT, straight)
+        if amounts[0] == 3:
+            score = THREE_OF_A_KIND
+            tie_ranks = [groups[0][0]] * 3
+        elif amounts[1] == 2:
+            score = TWO_PAIR
+            tie_ranks = [groups[0][0]] * 2 + [groups[1][0]] * 2
+        elif amounts[0] == 2:
+            score = PAIR
+            tie_ranks = [groups[0][0]] * 2
+        else:
+            score = HIGH_CARD
+            tie_ranks = []
+    # Filling the rest of the 5 cards with the highest remaining ranks
+    for rank in sorted(set(ranks), reverse=True):
+        if len(tie_ranks) == 5:
+            break
+        if rank not in tie_ranks:
+            tie_ranks.append(rank)
+    return pack_strength(score, tie_ranks)
+
+
+def get_flush_strength(rank_bits):
+    """
+    Returns the strength of the best straight flush or flush in
+    a set of rank bits from a single suit, or 0 if there are less
+    than 5 of them
+    """
+    ranks = [
+        rank for rank in reversed(RANKS) if rank_bits >> (rank - 2) & 1
+    ]
+    if len(ranks) < 5:
+        return 0
+    straight_high = STRAIGHT_HIGHS[0][rank_bits]
+    if straight_high:
+        score = ROYAL_FLUSH if straight_high == 14 else STRAIGHT_FLUSH
+        straight = range(straight_high, straight_high - 5, -1)
+        return pack_strength(score, straight)
+    return pack_strength(FLUSH, ranks[:5])
+
+
+def get_rank_key_strength(rank_key):
+    """
+    Returns the strength of the ranks in a base 5 rank key,
+    ignoring flushes, and stores it in RANK_KEY_STRENGTHS
+    """
+    ranks = []
+    key = rank_key
+    for rank in RANKS:
+        ranks.extend([rank] * (key % 5))
+        key //= 5
+    strength = get_repeated_strength(ranks)
+    RANK_KEY_STRENGTHS[rank_key] = strength
+    return strength
+
+
+def build_tables():
+    """
+    Returns the flush, unique rank and prime product tables
+    for every possible 5 card hand
+    """
+    flushes = [0] * 8192
+    unique_ranks = [0] * 8192
+    for ranks in combinations(reversed(RANKS), 5):
+        rank_bits = get_rank_bits(ranks)
+        flushes[rank_bits] = get_distinct_strength(ranks, True)
+        unique_ranks[rank_bits] = get_distinct_strength(ranks, False)
+    products = {}
+    for ranks in combinations_with_replacement(reversed(RANKS), 5):
+        # There are only 4 cards of each rank
+        if len(set(ranks)) == 5 or ranks.count(ranks[2]) == 5:
+            continue
+        product = 1
+        for rank in ranks:
+            product *= PRIMES[rank - 2]
+        products[product] = get_repeated_strength(list(ranks))
+    return flushes, unique_ranks, products
+
+
+# The best straight of every set of rank bits, by number of wild cards
+STRAIGHT_HIGHS = build_straight_highs()
+FLUSHES, UNIQUE_RANKS, PRODUCTS = build_tables()
+# The best flush in any set of rank bits from a single suit
+SUIT_STRENGTHS = [
+    get_flush_strength(rank_bits) for rank_bits in range(8192)
+]
+# The strength of each set of ranks that has been evaluated so far.
+# There are only around 200,000 sets of up to 8 ranks, so they are
+# filled in as they are needed instead of when the module is loaded
+RANK_KEY_STRENGTHS = {}
+
+
+def get_strength5(cards):
+    """
+    Returns the strength of exactly 5 cards that are not wild
+    """
+    card1, card2, card3, card4, card5 = cards
+    rank_bits = (
+        CARD_BITS[card1] | CARD_BITS[card2] | CARD_BITS[card3] |
+        CARD_BITS[card4] | CARD_BITS[card5]
+    )
+    if (CARD_SUIT_BITS[card1] & CARD_SUIT_BITS[card2] &
+            CARD_SUIT_BITS[card3] & CARD_SUIT_BITS[card4] &
+            CARD_SUIT_BITS[card5]):
+        return FLUSHES[rank_bits]
+    strength = UNIQUE_RANKS[rank_bits]
+    if strength:
+        return strength
+    return PRODUCTS[
+        CARD_PRIMES[card1] * CARD_PRIMES[card2] * CARD_PRIMES[card3] *
+        CARD_PRIMES[card4] * CARD_PRIMES[card5]
+    ]
+
+
+def get_strength(cards):
+    """
+    Returns the strength of the best 5 cards out of 5 to 8
+    cards that are not wild
+    """
+    rank_key = 0
+    hearts = diamonds = clubs = spades = 0
+    for card in cards:
+        rank_key += CARD_RANK_KEYS[card]
+        suit = CARD_SUITS[card]
+        if suit == 0:
+            hearts |= CARD_BITS[card]
+        elif suit == 1:
+            diamonds |= CARD_BITS[card]
+        elif suit == 2:
+            clubs |= CARD_BITS[card]
+        else:
+            spades |= CARD_BITS[card]
+    strength = RANK_KEY_STRENGTHS.get(rank_key)
+    if strength is None:
+        strength = get_rank_key_strength(rank_key)
+    return max(
+        strength, SUIT_STRENGTHS[hearts], SUIT_STRENGTHS[diamonds],
+        SUIT_STRENGTHS[clubs], SUIT_STRENGTHS[spades]
+    )
@@ -1,69 +1,143 @@
 # Write your code to expect a terminal of 80 characters wide and 24 rows high
+import argparse
+import asyncio
+import io
+import json
 import random
+import re
+import sys
+
+from poker import (
+    CARDS, FULL_DECK, RANK_NAMES, SUITS, evaluate, get_best_hand,
+    get_card_description, get_card_id, get_rank_name, parse_card,
+    split_cards
+)
+from poker.cards import CARD_PATTERN
+from poker.equity import calculate_equity, estimate_equity
+from poker.history import audit_histories
+from poker.preflop import get_preflop_equity
+from poker.protocol import serve
+from poker.stream import read_records, stream_results
+
+
+# Text that starts with more than one card in short notation, such as
+# "AsKdQ", which isn't matched with each rank and suit
+SHORT_CARDS_START = re.compile(f'(?:{CARD_PATTERN.pattern}){{2,}}')
 
 
 class Deck:
     """
-    Contains all the cards that have not been dealt
+    Contains all the cards that have not been dealt. The cards are
+    kept in a list, along with the position of each card in the list
+    and a 52 bit integer with a bit set for each card in the deck,
+    so cards can be found, taken and put back without searching
     """
+    # The bits of every card, and the position of each card in a new deck
+    ALL_CARD_BITS = (1 << 52) - 1
+    FULL_POSITIONS = [FULL_DECK.index(card) for card in range(52)]
+
     def __init__(self):
         """
         Creates an instance of Deck
         """
-        self.cards = self.get_full()
         self.wildcards = []
+        self.reset()
 
-    def get_full(self):
+    def reset(self):
         """
-        Returns a list every card in a deck
+        Puts every card back in the deck, in the order of a new deck
         """
-        cards = []
-        for suit in CardInput.suits:
-            for rank in range(2, 15):
-                card = Card(rank, suit)
-                cards.append(card)
-        return cards
+        # Cards are shared instances, so no new objects are created
+        self.cards = FULL_DECK.copy()
+        self.positions = self.FULL_POSITIONS.copy()
+        self.card_bits = self.ALL_CARD_BITS
+
+    def save(self):
+        """
+        Returns the cards in the deck, to be put back with restore
+        """
+        return self.cards.copy(), self.positions.copy(), self.card_bits
+
+    def restore(self, state):
+        """
+        Sets the deck back to how it was when save was called
+        """
+        cards, positions, self.card_bits = state
+        self.cards = cards.copy()
+        self.positions = positions.copy()
 
     def shuffle(self):
         """
         Shuffles the deck
         """
         random.shuffle(self.cards)
+        for index, card in enumerate(self.cards):
+            self.positions[card] = index
 
-    def take_card(self, card=None):
+    def contains(self, card):
+        """
+        Returns if a card is still in the deck
+        """
+        return self.card_bits >> card & 1 == 1
+
+    def take_card(self, card=None, output=None):
         """
         Returns a card of a given rank and suit, removing
-        the card from the deck. Takes the first card from the
-        deck if no rank or suit is given
+        the card from the deck. Takes the top card from the
+        deck if no rank or suit is given. Errors are printed
+        to output, or the terminal if it is None
         """
-        # Takes the first card from the deck
+        # Takes the top card from the deck
         # if no parameters are given
         if card is None:
             if len(self.cards) > 0:
-                found_card = self.cards[0]
-                self.cards.pop(0)
-                return found_card
+                card = self.cards[-1]
+                self.remove(card)
+                return card
             # Notifies the user when there are no cards in the
             # deck, and returns None
-            print('No more cards in the deck!')
+            print('No more cards in the deck!', file=output)
             return None
-        if card in self.cards:
-            self.cards.remove(card)
+        if self.contains(card):
+            self.remove(card)
             return card
         # Creates a card to print an error if the card
         # does not exist in the deck
         card_desc = get_card_description(card.rank, card.suit)
-        print_error(f'No {card_desc} in deck')
+        print_error(f'No {card_desc} in deck', output=output)
         return None
 
+    def remove(self, card):
+        """
+        Removes a card that is in the deck, by moving the last
+        card in the list into its place
+        """
+        position = self.positions[card]
+        last_card = self.cards.pop()
+        if last_card != card:
+            self.cards[position] = last_card
+            self.positions[last_card] = position
+        self.card_bits &= ~(1 << card)
+
+    def return_cards(self, cards):
+        """
+        Puts cards that were taken back into the deck
+        """
+        for card in cards:
+            if not self.contains(card):
+                self.positions[card] = len(self.cards)
+                self.cards.append(card)
+                self.card_bits |= 1 << card
+
     def get_card(self, rank, suit):
         """
         Gets a specific card from the deck. Returns
         None if no card exists
         """
-        for card in self.cards:
-            if rank == card.rank and suit == card.suit:
-                return card
+        card = CARDS[get_card_id(rank, suit)]
+        if self.contains(card):
+            return card
+        return None
 
 
 class Hand:
@@ -77,20 +151,20 @@ class Hand:
         """
         self.name = name
         self.cards = cards
-        self.cards_sorted = []
-        self.wildcards = 0
-        # Used to store cards that wild cards are imitating
-        self.fake_cards = []
         self.value = {
             'name': '',
             'score': 0,
             'subscore': 0,
-            'high_card': 0
+            'strength': 0
         }
+        # The cards and wild cards the value was found with, so the
+        # hand is only evaluated again if either of them change
+        self.value_key = None
 
-    def print_hand(self):
+    def print_hand(self, wildcards, output=None):
         """
-        Prints each card in this hand to the terminal
+        Prints each card in this hand to output, or the terminal
+        if it is None, highlighting any wild cards
         """
         print_text = f'{self.name}:'
         # Adding the spacing after the player name
@@ -100,7 +174,7 @@ class Hand:
             print_text += '\t\t'
         # Printing each card
         for card in self.cards:
-            card_desc = card.description()
+            card_desc = card.description(wildcards)
             print_text += card_desc
             if len(self.cards) <= 6:
                 print_text += '\t'
@@ -111,402 +185,80 @@ class Hand:
                     print_text += ' '
                     space_amount -= 1
         print_text += self.value['name']
-        print(print_text)
-
-    def format_hand(self):
-        """
-        Updates the cards_sorted value of this hand, sorting
-        the cards in descending order
-        Sorts the cards in descending order in a dictionary,
-        removing any wildcards and storing them separately, and
-        setting self.cards_sorted to this dictionary
-        """
-        self.wildcards = 0
-        for card in self.cards:
-            if card.is_wild():
-                self.wildcards += 1
-
-        self.cards_sorted = self.sort(self.cards, True)
-
-    def sort(self, hand_list, remove_wild):
-        """
-        Sorts a given hand by its rank in descending order
-        """
-        cards_temp = hand_list.copy()
-        cards_sorted = []
-        while len(cards_temp) > 0:
-            # Finding the highest ranking card in the list
-            highest_card = None
-            for card in cards_temp:
-                if (highest_card is None or
-                        card.rank > highest_card.rank):
-                    highest_card = card
-            # Only add wild cards if specified
-            if not (remove_wild and highest_card.is_wild()):
-                cards_sorted.append(highest_card)
-            cards_temp.remove(highest_card)
-        return cards_sorted
-
-    def add_fake_card(self, rank, suit=''):
-        """
-        Adds a card that a wild card is imitating to the
-        hand. This card is not part of the main deck
-        """
-        fake_card = Card(rank, suit)
-        self.fake_cards.append(fake_card)
-
-    def combine_all_cards(self):
-        """
-        Returns a sorted list of all real and fake cards
-        within this hand
-        """
-        new_cards = self.cards_sorted.copy()
-        new_cards.extend(self.fake_cards)
-        # For Flushes, only cards of the same suit matter
-        if self.value['name'] == 'Flush':
-            new_cards = self.get_suit_only(
-                new_cards, self.value['subscore']
-            )
-        new_cards = self.sort(new_cards, False)
-        return new_cards
-
-    def get_suit_only(self, cards, suit):
-        """
-        Returns a hand that only contains a given suit
-        """
-        new_cards = []
-        for card in cards:
-            if card.suit == suit:
-                new_cards.append(card)
-        return new_cards
-
-    def set_value(self):
-        """
-        Stores the value of the hand in its instance
-        """
-        self.value = self.get_value()
-
-    def get_value(self):
-        """
-        Checks if the hand has a certain card combination,
-        starting with the highest value and working its way
-        down until a match is found
-        """
-        self.format_hand()
-
-        pairs = self.get_repeating_values('rank')
-        current_kind = None
-        # If all the cards in the hand are wild, set them all to Ace
-        if len(self.cards_sorted) == 0:
-            current_kind = 14
-            for i in range(self.wildcards):
-                self.add_fake_card(current_kind)
-        # If the hand has 5 cards of the same rank
-        else:
-            current_kind = self.is_of_kind(5, pairs)
-        if current_kind is not None:
-            return self.create_value_dict('5 of a Kind', current_kind)
-        # If the hand has 5 consecutive ranking cards of the same suit
-        straight_high = self.is_straight_flush()
-        if straight_high is not None:
-            name = 'Straight Flush'
-            # Rank 14 = Ace
-            if straight_high == 14:
-                name = 'Royal Flush'
-            return self.create_value_dict(name, straight_high)
-        # If the hand has 4 cards of the same rank
-        current_kind = self.is_of_kind(4, pairs)
-        if current_kind is not None:
-            return self.create_value_dict('4 of a Kind', current_kind)
-        # If the hand has 3 cards of the same rank and
-        # a pair of a different rank
-        house_ranks = self.is_full_house(pairs)
-        if house_ranks is not None:
-            return self.create_value_dict('Full House', house_ranks)
-        # If the hand has 5 cards of the same suit
-        flush_suit = self.is_flush()
-        if flush_suit is not None:
-            return self.create_value_dict('Flush', flush_suit)
-        # If the hand has 5 consecutive ranking cards
-        straight_high = self.is_straight(self.cards_sorted)
-        if straight_high is not None:
-            return self.create_value_dict('Straight', straight_high)
-        # If the hand has 3 cards of the same rank
-        current_kind = self.is_of_kind(3, pairs)
-        if current_kind is not None:
-            return self.create_value_dict('3 of a Kind', current_kind)
-        # If the hand has 2 pairs of cards of the same rank
-        pair_groups = self.count_repeating_values(pairs, 2)
-        if len(pair_groups) >= 2:
-            return self.create_value_dict('Two Pair', pair_groups)
-        # If the hand has 2 cards of the same rank
-        current_kind = self.is_of_kind(2, pairs)
-        if current_kind is not None:
-            return self.create_value_dict('Pair', current_kind)
-        # For everything else
-        return self.create_value_dict('High Card', 0)
-
-    def create_value_dict(self, name, subscore):
-        """
-        Creates a dictionary containing all the information
-        about the value of the hand and returns it
-        """
-        value_info = {}
-        value_info['name'] = name
-        if name == 'High Card':
-            value_info['score'] = 1
-        elif name == 'Pair':
-            value_info['score'] = 2
-        elif name == 'Two Pair':
-            value_info['score'] = 3
-        elif name == '3 of a Kind':
-            value_info['score'] = 4
-        elif name == 'Straight':
-            value_info['score'] = 5
-        elif name == 'Flush':
-            value_info['score'] = 6
-        elif name == 'Full House':
-            value_info['score'] = 7
-        elif name == '4 of a Kind':
-            value_info['score'] = 8
-        elif name == 'Straight Flush':
-            value_info['score'] = 9
-        elif name == 'Royal Flush':
-            value_info['score'] = 10
-        elif name == '5 of a Kind':
-            value_info['score'] = 11
-        value_info['subscore'] = subscore
-        return value_info
-
-    def is_of_kind(self, number, pairs):
-        """
-        Returns if the hand has has a certain number
-        of matching card ranks, and returns that rank
-        """
-        self.fake_cards.clear()
-        highest_amount = pairs[0]['amount']
-        if highest_amount + self.wildcards >= number:
-            # Adding the wild cards to the sorted hand as the
-            # rank of the highest group of cards
-            of_kind_rank = pairs[0]['value']
-            while highest_amount < number:
-                self.add_fake_card(of_kind_rank)
-                highest_amount += 1
-
-            return of_kind_rank
-        return None
-
-    def is_flush(self):
-        """
-        Evaluates if the hand has 5 cards of the same suit,
-        returns the suit if it does, and None if it doesn't
-        """
-        self.fake_cards.clear()
-        suits = self.get_repeating_values('suit')
-        best_suit = suits[0]['value']
-        suit_amount = suits[0]['amount']
-        if suit_amount + self.wildcards >= 5:
-            while suit_amount < 5:
-                # Always pick the best rank for wild cards
-                self.add_fake_card(14, best_suit)
-                suit_amount += 1
-            return best_suit
-        return None
-
-    def get_repeating_values(self, value_type):
-        """
-        Returns all the repeating ranks or suits in a hand,
-        depending on value_type
-        """
-        # The ranks list stores each unique rank in the hand,
-        # and ranks_amount stores how many times that rank
-        # appears in the hand
-        values = []
-        value_amount = []
-        for card in self.cards_sorted:
-            # Getting what property of the card will be checked
-            # for repeats
-            card_value = card.rank
-            if value_type == 'suit':
-                card_value = card.suit
-
-            if card_value in values:
-                index = values.index(card_value)
-                value_amount[index] += 1
-            else:
-                # Add the value to the list if it does not exist
-                values.append(card_value)
-                value_amount.append(1)
-        # Sorts the pairs in descending order by amount of ranks
-        final_values = []
-        for index in range(len(values)):
-            value_dict = {
-                'value': values[index],
-                'amount': value_amount[index]
-            }
-            final_values.append(value_dict)
-        final_values = sort_dict_list(
-            final_values, False, 'amount', 'value'
-        )
-        return final_values
+        print(print_text, file=output)
 
-    def count_repeating_values(self, values, number):
+    def set_value(self, wildcards):
         """
-        Returns how many groups of (rank * number) the
-        hand has
+        Stores the value of the hand in its instance, unless it
+        was already found with the same cards and wild cards
         """
-        value_counts = []
-        for value in values:
-            if value['amount'] == number:
-                value_counts.append(value['value'])
-        return value_counts
+        value_key = (tuple(self.cards), tuple(wildcards))
+        if value_key != self.value_key:
+            self.value = self.get_value(wildcards)
+            self.value_key = value_key
 
-    def is_straight(self, hand_checking):
+    def get_value(self, wildcards=()):
         """
-        Checks if 5 cards are ranked in consecutive order
-        and, if true, returns the highest card in the
-        straight. Returns None if false
+        Returns the value of the hand, using the wild cards
+        of the current round
         """
-        self.fake_cards.clear()
-        # Duplicating the wild cards as it will be altered
-        # for this evaluation
-        wildcards = self.wildcards
-        wildcard_ranks = []
-        # Start at the lowest ranked card and work its way up
-        previous_rank = 0
-        straight_streak = 0
-        high_rank = None
-        i = 0
-        while i < len(hand_checking):
-            card = hand_checking[i]
-            i += 1
-            rank = card.rank
-            # Restarting the straight evaluation
-            if (straight_streak == 0 or
-                    (rank < previous_rank - 1 and wildcards <= 0)):
-                straight_streak = 1
-                previous_rank = rank
-                high_rank = rank
-                wildcards = self.wildcards
-                wildcard_ranks.clear()
-                continue
-            # If the rank is the same as the previous rank then
-            # the loop will ignore it
-            if rank == previous_rank:
-                continue
-            if rank < previous_rank - 1:
-                wildcards -= 1
-                wildcard_ranks.append(previous_rank - 1)
-                # Starting the next iteration of the loop at the
-                # same card if a wild card is used in its place
-                i -= 1
-            straight_streak += 1
-            previous_rank -= 1
-            if straight_streak >= 5 - wildcards:
-                # Adding the simulated wild cards to the sorted deck
-                for wild_rank in wildcard_ranks:
-                    self.add_fake_card(wild_rank)
-                # Finding the best ranks for the remaining fake cards
-                while wildcards > 0:
-                    if high_rank < 14:
-                        # Moving up the ranks until it reaches an Ace
-                        high_rank += 1
-                        self.add_fake_card(high_rank)
-                    else:
-                        # Moving down the ranks
-                        self.add_fake_card(previous_rank)
-                        previous_rank -= 1
-                    wildcards -= 1
-                return high_rank
-        return None
-
-    def is_straight_flush(self):
-        """
-        Checks if 5 cards are ranked in consecutive order
-        and of the same suit. If true, returns the highest card
-        in the straight. Returns None if false
-        """
-        # Sorts each card by its suit into a list of lists
-        suits = []
-        for suit_sorting in CardInput.suits:
-            # Add an empty list for each suit
-            suits.append([])
-            for card in self.cards_sorted:
-                if card.suit == suit_sorting:
-                    # Adds the card to the newest list
-                    suits[-1].append(card)
-        # Checking each suit for a straight
-        for hand_suit in suits:
-            high_card = self.is_straight(hand_suit)
-            if high_card is not None:
-                return high_card
-        return None
-
-    def is_full_house(self, pairs):
-        """
-        Returns True if the hand has 3 ranks of the same
-        kind, and a pair of a different rank
-        """
-        # Stores the ranks of the full house
-        house_ranks = []
-        # Checking for the 3 of a Kind part of the Full House
-        three_pair = self.is_of_kind(3, pairs)
-        if three_pair is None:
-            return None
-        house_ranks.append(three_pair)
-        # Checking the second highest group of ranks
-        two_pair = pairs[1]['amount']
-        if two_pair < 2:
-            return None
-        house_ranks.append(two_pair)
-        return house_ranks
+        return evaluate(self.cards, wildcards)
 
-    def take_from_deck(self, number):
+    def take_from_deck(self, deck, number, output=None):
         """
         Sets this hand to a given number of random cards
+        from a deck
         """
         cards_list = []
         for i in range(0, number):
-            card = deck.take_card()
+            card = deck.take_card(output=output)
             cards_list.append(card)
         self.cards = cards_list
 
 
-class Card:
+class RoundHands:
     """
-    A single card consisting of a rank and a suit
+    Holds the hands entered in a round, and keeps track of the
+    best hand (or hands) as each hand is added, so the hands
+    entered before it don't need to be compared again
     """
-    def __init__(self, rank, suit):
+    def __init__(self):
         """
-        Creates an instance of Card
+        Creates an instance of RoundHands
         """
-        self.rank = rank
-        self.suit = suit
+        self.hands = []
+        self.best_hands = []
+        self.best_strength = 0
+        self.wildcards = None
 
-    def description(self):
+    def add_hand(self, hand, wildcards):
         """
-        Returns the cards rank and suit as a single word,
-        only giving the first letter of worded ranks and suits
-        and highlighting wild cards with **
+        Adds a hand to the round, evaluating only the new hand
+        unless the wild cards have changed since the last one
         """
-        wild = self.is_wild()
-        desc_text = ''
-        if wild:
-            desc_text = '*'
-        rank_name = get_rank_name(self.rank)
-        simple_rank = self.rank
-        if self.rank > 10:
-            simple_rank = rank_name[0]
-        desc_text += f'{simple_rank}{self.suit[0]}'
-        if wild:
-            desc_text += '*'
-        return desc_text
-
-    def is_wild(self):
+        self.hands.append(hand)
+        if self.wildcards != wildcards:
+            self.update(wildcards)
+            return
+        hand.set_value(wildcards)
+        strength = hand.value['strength']
+        if strength > self.best_strength:
+            self.best_hands = [hand]
+            self.best_strength = strength
+        elif strength == self.best_strength:
+            self.best_hands.append(hand)
+
+    def update(self, wildcards):
         """
-        Returns if this card is a wild card
+        Evaluates every hand again with the given wild cards
         """
-        return self.rank in deck.wildcards
+        self.wildcards = list(wildcards)
+        for hand in self.hands:
+            hand.set_value(wildcards)
+        self.best_hands = get_best_hand(self.hands)
+        self.best_strength = 0
+        if len(self.best_hands) > 0:
+            self.best_strength = self.best_hands[0].value['strength']
 
 
 class CardInput:
@@ -514,8 +266,8 @@ class CardInput:
     Stores a single card input by the user, and contains
     functions to convert that string into a card dictionary
     """
-    ranks = ['Jack', 'Queen', 'King', 'Ace']
-    suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+    ranks = RANK_NAMES
+    suits = SUITS
 
     def __init__(self, text):
         """
@@ -523,7 +275,7 @@ class CardInput:
         """
         self.text = text
 
-    def get(self):
+    def get(self, output=None):
         """
         Reads the card input and returns a list of ranks and
         suits that best match the input
@@ -541,7 +293,7 @@ class CardInput:
 
         ranks = self.find_values(input_words, 'rank')
         if len(ranks) == 0:
-            print_error(missing_rank_message)
+            print_error(missing_rank_message, output=output)
             return None
         for rank in ranks:
             temp_words = input_words.copy()
@@ -572,10 +324,10 @@ class CardInput:
                     }
                     best_matches.append(found_card)
         if not has_ranks:
-            print_error(missing_rank_message)
+            print_error(missing_rank_message, output=output)
             return None
         if not has_suits:
-            print_error(f'No suits found in "{self.text}"')
+            print_error(f'No suits found in "{self.text}"', output=output)
             return None
         return best_matches
 
@@ -653,15 +405,21 @@ class CardInput:
                 return True
         return False
 
-    def convert(self):
+    def convert(self, deck, output=None):
         """
-        Converts a string into an instance of Card
+        Converts a string into an instance of Card from a deck.
+        Errors are printed to output, or the terminal if it is None
         """
         # Returns an error if an input contains no text
         if self.text == '':
-            print_error('Blank card detected')
+            print_error('Blank card detected', output=output)
             return None
-        card_objects = self.get()
+        # Cards in short notation, such as "Kh" or "10d", are looked up
+        # directly instead of being matched with every rank and suit
+        card = parse_card(self.text)
+        if card is not None:
+            return self.take_from_deck(deck, card.rank, card.suit, output)
+        card_objects = self.get(output)
         if card_objects is not None:
             # Only 1 card should exist in each input
             if len(card_objects) > 1:
@@ -673,26 +431,98 @@ class CardInput:
                     )
                     found_cards.append(card_desc)
                 print_error(
-                    f'Multiple cards detected in "{self.text}"', found_cards
+                    f'Multiple cards detected in "{self.text}"', found_cards,
+                    output
                 )
                 return None
             if len(card_objects) == 1:
-                rank = card_objects[0]['rank']
-                suit = card_objects[0]['suit']
-                card_obj = deck.get_card(rank, suit)
-                # If the card doesn't exist in the deck, then the card
-                # exists somewhere else
-                if card_obj is None:
-                    card_desc = get_card_description(rank, suit)
-                    print_error(f'Multiple {card_desc}')
-                return card_obj
+                return self.take_from_deck(
+                    deck, card_objects[0]['rank'], card_objects[0]['suit'],
+                    output
+                )
         return None
 
+    def take_from_deck(self, deck, rank, suit, output=None):
+        """
+        Returns the card with a given rank and suit from a deck,
+        or None if it has already been taken
+        """
+        card_obj = deck.get_card(rank, suit)
+        # If the card doesn't exist in the deck, then the card
+        # exists somewhere else
+        if card_obj is None:
+            card_desc = get_card_description(rank, suit)
+            print_error(f'Multiple {card_desc}', output=output)
+        return card_obj
+
+
+class GameState:
+    """
+    Holds everything a single game changes: its deck, the names of
+    its players and where it prints to. Every function that plays
+    the game is given the state of its own game, so many games can
+    be played at the same time
+    """
+    def __init__(self, output=None):
+        """
+        Creates an instance of GameState. The game prints to output,
+        or the terminal if it is None
+        """
+        # Stores all the cards that haven't been taken
+        self.deck = Deck()
+        # For storing all the player names
+        self.names = []
+        self.output = output
+
+
+class GameSession:
+    """
+    A game played over a connection instead of in the terminal. Each
+    session has its own game state, and the game prints to a buffer
+    that belongs to the session, so many sessions can share a single
+    process
+    """
+    def __init__(self):
+        """
+        Creates an instance of GameSession
+        """
+        self.output = io.StringIO()
+        self.state = GameState(self.output)
+        self.game = play_game(self.state)
+        self.finished = False
+
+    def send(self, answer=None):
+        """
+        Gives the user's answer to the game, and returns everything the
+        game printed up to and including the next message it asks with.
+        The game is started if no answer is given
+        """
+        try:
+            if answer is None:
+                message = next(self.game)
+            else:
+                message = self.game.send(answer)
+            self.output.write(message)
+        except StopIteration:
+            self.finished = True
+        text = self.output.getvalue()
+        # Emptying the buffer for the next answer
+        self.output.seek(0)
+        self.output.truncate()
+        return text
 
-def convert_hand(cards_list):
+    def close(self):
+        """
+        Stops the game if the connection closes before it finishes
+        """
+        self.game.close()
+        self.finished = True
+
+
+def convert_hand(cards_list, deck, output=None):
     """
     Converts a list of strings into a list of objects
-    containing the rank and the suit
+    containing the rank and the suit, taking them from a deck
     Example: "10 of Diamonds" => {'rank': 10, 'suit': 'Diamonds'}
     """
     new_cards = []
@@ -701,22 +531,22 @@ def convert_hand(cards_list):
         # Stopping the loop if the user enters a comma at the end
         if card.text == '' and index == len(cards_list) - 1:
             break
-        card_obj = card.convert()
+        card_obj = card.convert(deck, output)
         if card_obj is not None:
-            deck.take_card(card_obj)
+            deck.take_card(card_obj, output)
             new_cards.append(card_obj)
             continue
         # Returning any cards taken from this hand
         # if one is invalid
-        deck.cards.extend(new_cards)
+        deck.return_cards(new_cards)
         return None
     return new_cards
 
 
-def validate_hand(cards_list, card_number):
+def validate_hand(cards_list, card_number, deck, output=None):
     """
     Checks if a poker hand entered by the user can
-    produce a valid set of cards
+    produce a valid set of cards from a deck
     """
     formatted_hand = []
     # Each hand must contain at least 5 cards
@@ -724,28 +554,32 @@ def validate_hand(cards_list, card_number):
     card_len = len(cards_list)
     # All hands must have the same length once one is entered
     if card_number == 0:
-        enough_cards = number_in_range('card', card_len, 5, 8)
+        enough_cards = number_in_range('card', card_len, 5, 8, output)
     else:
         enough_cards = number_in_range(
-            'card', card_len, card_number, card_number
+            'card', card_len, card_number, card_number, output
         )
     if not enough_cards:
         return None
-    formatted_hand = convert_hand(cards_list)
+    formatted_hand = convert_hand(cards_list, deck, output)
     return formatted_hand
 
 
-def get_hand_input(card_number):
+def get_hand_input(state, card_number):
     """
     Requests a hand to be manually entered by the user, and returns
     an instance of Hand
     """
-    player_name = get_required_input(
-        'Name', 'Please enter your name: ', 12, names
+    output = state.output
+    player_name = yield from get_required_input(
+        'Name', 'Please enter your name: ', 12, state.names, output
+    )
+    state.names.append(player_name)
+    print(f'Welcome {player_name}!\n', file=output)
+    print(
+        'Please enter your poker hand, or "random" for a random hand.',
+        file=output
     )
-    names.append(player_name)
-    print(f'Welcome {player_name}!\n')
-    print('Please enter your poker hand, or "random" for a random hand.')
     # Keep requesting an input from the user until a valid hand is entered
     while True:
         # Telling the user the correct amount of cards they need to enter
@@ -753,63 +587,94 @@ def get_hand_input(card_number):
         if card_number > 0:
             text = str(card_number)
         print(
-            f'- Your hand must contain {text} cards, separated by a comma.'
+            f'- Your hand must contain {text} cards, separated by a comma.',
+            file=output
+        )
+        print('- Each card must contain a rank and a suit.', file=output)
+        print(
+            '- Example: "King of Hearts", "King Heart", "KH"\n', file=output
+        )
+        hand_input = yield from get_required_input(
+            'Hand', 'Enter hand here: ', output=output
         )
-        print('- Each card must contain a rank and a suit.')
-        print('- Example: "King of Hearts", "King Heart", "KH"\n')
-        hand_input = get_required_input('Hand', 'Enter hand here: ')
         # Creates a random hand if the user specifies it
         if contains_word(hand_input, 'random'):
             new_hand = Hand(player_name, [])
-            deck.shuffle()
+            state.deck.shuffle()
             random_cards = 5
             if card_number > 0:
                 random_cards = card_number
-            new_hand.take_from_deck(random_cards)
+            new_hand.take_from_deck(state.deck, random_cards, output)
             return new_hand
 
-        # Splits the inputs into separate elements in a list
-        hand_list = hand_input.split(',')
-        card_objects = []
-        for card_text in hand_list:
-            # Removing any white space from the edge of each card input
-            text_stripped = card_text.strip()
-            card_object = CardInput(text_stripped)
-            card_objects.append(card_object)
-
-        cards = validate_hand(card_objects, card_number)
+        card_objects = get_card_inputs(hand_input, output)
+        if card_objects is None:
+            continue
+        cards = validate_hand(card_objects, card_number, state.deck, output)
         if cards is not None:
             new_hand = Hand(player_name, cards)
             return new_hand
 
 
+def get_card_inputs(hand_input, output=None):
+    """
+    Returns a CardInput for each card in a hand entered by the user.
+    Returns None and prints an error if part of the hand starts with
+    more than one card in short notation but has other text after
+    them, as it can't be known which cards were meant
+    """
+    # Splits the inputs into separate elements in a list. Hands
+    # in short notation, such as "AsKdQhJcTs", don't need commas
+    hand_list = split_cards(hand_input)
+    if hand_list is None:
+        hand_list = hand_input.split(',')
+        for card_text in hand_list:
+            compact = ''.join(card_text.lower().split())
+            if SHORT_CARDS_START.match(compact):
+                print_error(
+                    f'Invalid cards in "{card_text.strip()}"', output=output
+                )
+                return None
+    card_objects = []
+    for card_text in hand_list:
+        # Removing any white space from the edge of each card input
+        text_stripped = card_text.strip()
+        card_object = CardInput(text_stripped)
+        card_objects.append(card_object)
+    return card_objects
+
+
 def get_required_input(
-    input_type, message, max_chars=0, duplicates=[]
+    input_type, message, max_chars=0, duplicates=[], output=None
 ):
     """
     Requests an input from the user continuously until
-    a valid input is given
+    a valid input is given. Like every function that asks the user
+    for something, this yields each message to ask with and is sent
+    the user's answer, so the game can be played in the terminal or
+    in a session with play_in_terminal or GameSession
     """
     user_input = ''
     valid = False
     while not valid:
-        user_input = input(message)
-        print('')
+        user_input = yield message
+        print('', file=output)
         user_input = user_input.strip()
         if user_input == '':
-            print_error(f'{input_type} is blank')
+            print_error(f'{input_type} is blank', output=output)
             continue
         # Checking if the input length is within a limit
         if max_chars > 0 and len(user_input) > max_chars:
             print_error(
-                f'{input_type} can only be {max_chars} characters'
+                f'{input_type} can only be {max_chars} characters',
+                output=output
             )
             continue
         # For inputs that must be unique
         has_duplicate = False
         for duplicate in duplicates:
             if user_input == duplicate:
-                print_error(f'{input_type} already exists')
+                print_error(f'{input_type} already exists', output=output)
                 has_duplicate = True
                 continue
         if not has_duplicate:
@@ -817,15 +682,7 @@ def get_required_input(
     return user_input
 
 
-def get_card_description(rank, suit):
-    """
-    Returns the cards rank and suit as a readable string
-    """
-    rank_name = get_rank_name(rank)
-    return f'{rank_name} of {suit}'
-
-
-def get_wildcards():
+def get_wildcards(output=None):
     """
     Requests the user to enter a set of wild cards that
     can affect the hand. Can have up to 3
@@ -833,30 +690,36 @@ def get_wildcards():
     request_message = 'Do you wish to include wildcards in your game?\n'
     request_message += '- Wild cards are cards that can take form of any\n'
     request_message += '  rank or suit to make the best possible hand.'
-    if user_allows(request_message):
+    if (yield from user_allows(request_message, output)):
         while True:
-            print('Please enter up to 3 wild cards, separated by a comma')
-            print('- Only enter the rank of the card, i.e. 2 - Ace')
-            wildcards = input('Wild Cards: ')
+            print(
+                'Please enter up to 3 wild cards, separated by a comma',
+                file=output
+            )
+            print(
+                '- Only enter the rank of the card, i.e. 2 - Ace', file=output
+            )
+            wildcards = yield 'Wild Cards: '
             wildcards = wildcards.strip()
             # Adds a gap between the input and the next print
-            print('')
+            print('', file=output)
             if wildcards == '':
-                if user_allows('No wild cards entered. Proceed anyway?'):
+                if (yield from user_allows(
+                        'No wild cards entered. Proceed anyway?', output)):
                     return []
                 else:
                     continue
-            wildcard_ranks = validate_wildcards(wildcards)
+            wildcard_ranks = validate_wildcards(wildcards, output)
             if wildcard_ranks is not None:
                 return wildcard_ranks
     else:
         return []
 
 
-def validate_wildcards(wildcard_input):
+def validate_wildcards(wildcard_input, output=None):
     """
     Gets a list of wild cards from an input, returning the list if
-    valid and printing an error if not
+    valid and printing an error to output if not
     """
     cards_list = wildcard_input.split(',')
     wildcard_ranks = []
@@ -869,14 +732,14 @@ def validate_wildcards(wildcard_input):
             # In case the user entered a comma at the end
             if index == len(cards_list) - 1:
                 break
-            print_error('Blank card detected')
+            print_error('Blank card detected', output=output)
             return None
         card = CardInput(card_text)
         # Splitting the input into words
         rank_words = card_text.split(' ')
         ranks = card.find_values(rank_words, 'rank', True)
         if len(ranks) == 0:
-            print_error(f'No ranks found in "{card_text}"')
+            print_error(f'No ranks found in "{card_text}"', output=output)
             return None
         elif len(ranks) > 1:
             rank_names = []
@@ -885,7 +748,7 @@ def validate_wildcards(wildcard_input):
                 rank_names.append(rank_name)
             print_error(
                 f'Multiple ranks found in "{card_text}"',
-                rank_names
+                rank_names, output
             )
             return None
         for rank in ranks:
@@ -894,33 +757,11 @@ def validate_wildcards(wildcard_input):
                 wildcard_ranks.append(rank['value'])
     # Checking if the number of wild cards is less than 3
     wild_number = len(wildcard_ranks)
-    if number_in_range('wild card', wild_number, 0, 3):
+    if number_in_range('wild card', wild_number, 0, 3, output):
         return wildcard_ranks
     return None
 
 
-def get_rank_name(rank_number):
-    """
-    Returns the rank of a given card as a string,
-    consisting of the rank's full name
-    """
-    # For cards greater than 10
-    if rank_number > 10:
-        # The 11th rank will be "Jack", which is the first
-        # element [0] in CardInput.ranks
-        return CardInput.ranks[rank_number - 11]
-    return str(rank_number)
-
-
-def get_rank_value(rank_name):
-    """
-    Returns the rank of the card as an integer
-    """
-    if rank_name in CardInput.ranks:
-        return CardInput.ranks.index(rank_name) + 11
-    return int(rank_name)
-
-
 def get_hand_names(hands):
     """
     Returns a list of all names from a list of hands
@@ -931,110 +772,14 @@ def get_hand_names(hands):
     return hand_names
 
 
-def get_best_hand(hands):
-    """
-    Returns the hand with the best value out of a
-    given list of hands
-    """
-    best_hand = []
-    for hand in hands:
-        if len(best_hand) == 0:
-            best_hand = [hand]
-            continue
-        hand_score = hand.value['score']
-        best_score = best_hand[0].value['score']
-        if hand_score < best_score:
-            continue
-        if hand_score > best_score:
-            best_hand = [hand]
-            continue
-        # If 2 hands have the same value, the hand with the
-        # greater subscore will prevail
-        hand_sub = hand.value['subscore']
-        best_sub = best_hand[0].value['subscore']
-        comparison = compare_subscores(hand_sub, best_sub)
-        if comparison != '=':
-            if comparison == '>':
-                best_hand = [hand]
-            continue
-        # If both the score and subscore match, then check
-        # which has the higher ranked cards
-        comparison = compare_high_cards(hand, best_hand[0])
-        if comparison == '>':
-            best_hand = [hand]
-        elif comparison == '=':
-            best_hand.append(hand)
-        # We do nothing if the hand in the loop is less than the best
-    return best_hand
-
-
-def compare_subscores(sub1, sub2):
-    """
-    Compares 2 subscores and returns a string
-    '<', '>' or '='
-    """
-    # For "of Kind" and Straight hand values
-    if isinstance(sub1, int):
-        return compare_numbers(sub1, sub2)
-    # Two Pair and Full House hand values have
-    # subscores of type list
-    elif isinstance(sub1, list):
-        # Only comparing the first 2 pairs, if more than 2
-        for i in range(0, 2):
-            comparison = compare_numbers(sub1[i], sub2[i])
-            if comparison != '=':
-                return comparison
-    return '='
-
-
-def compare_high_cards(hand1, hand2):
-    """
-    Compares the high cards of 2 hands and returns
-    ">" if hand1 has higher cards, "<" if hand2 has
-    higher cards, or "=" if they are equal
-    """
-    index = 0
-    cards1 = hand1.combine_all_cards()
-    cards2 = hand2.combine_all_cards()
-    # Loops through all the cards until a difference is found,
-    # or no cards are left
-    while True:
-        highcard1 = 0
-        highcard2 = 0
-        if index < len(cards1):
-            highcard1 = cards1[index].rank
-        if index < len(cards2):
-            highcard2 = cards2[index].rank
-        # If both hands went through all their cards without finding
-        # a difference, then they are identical
-        if highcard1 == 0 and highcard2 == 0:
-            return '='
-        comparison = compare_numbers(highcard1, highcard2)
-        # End the function once a difference is found
-        if comparison != '=':
-            return comparison
-        index += 1
-
-
-def compare_numbers(num1, num2):
-    """
-    Compares 2 values and returns a string
-    '<', '>' or '='
-    """
-    if num1 > num2:
-        return '>'
-    if num1 < num2:
-        return '<'
-    return '='
-
-
-def print_hand_table(hands, card_number):
+def print_hand_table(state, round_hands, card_number):
     """
-    Prints all the hands along with their name and value
-    in a table
+    Prints all the hands in a round along with their name
+    and value in a table
     """
+    output = state.output
     # Displaying wild cards first, if any
-    print_wildcards()
+    print_wildcards(state.deck.wildcards, output)
 
     # Printing the heading labels
     heading = 'Name:\t\tCards:'
@@ -1049,38 +794,37 @@ def print_hand_table(hands, card_number):
         else:
             heading += '\t'
     heading += 'Value:'
-    print(heading)
-    for hand in hands:
-        hand.set_value()
-        hand.print_hand()
+    print(heading, file=output)
+    for hand in round_hands.hands:
+        hand.print_hand(state.deck.wildcards, output)
 
     # Displaying the winner for more than one hand
-    print_winning_hands(hands)
+    print_winning_hands(round_hands, output)
 
 
-def print_wildcards():
+def print_wildcards(wildcards, output=None):
     """
-    Prints a list of wild cards to the terminal,
-    surrounding them with two asterices (**)
+    Prints a list of wild cards to output, or the terminal
+    if it is None, surrounding them with two asterices (**)
     """
-    if len(deck.wildcards) > 0:
+    if len(wildcards) > 0:
         wild_text = 'Wild cards: '
-        for i in range(len(deck.wildcards)):
-            wild_card_text = get_rank_name(deck.wildcards[i])
+        for i in range(len(wildcards)):
+            wild_card_text = get_rank_name(wildcards[i])
             wild_text += f'*{wild_card_text}*'
             # Commas to separate multiple wild cards
-            if i < len(deck.wildcards) - 1:
+            if i < len(wildcards) - 1:
                 wild_text += ', '
-        print(wild_text)
+        print(wild_text, file=output)
 
 
-def print_winning_hands(hands):
+def print_winning_hands(round_hands, output=None):
     """
-    Finds the winning hand (or hands) and prints
-    them to the terminal
+    Prints the winning hand (or hands) of a round
+    to output, or the terminal if it is None
     """
-    if len(hands) > 1:
-        best_hand = get_best_hand(hands)
+    if len(round_hands.hands) > 1:
+        best_hand = round_hands.best_hands
         winner = ''
         # For only 1 winner
         if len(best_hand) == 1:
@@ -1090,7 +834,7 @@ def print_winning_hands(hands):
             winner = 'Draw between '
             winning_names = get_hand_names(best_hand)
             winner += get_list_as_sentence(winning_names)
-        print(f'Winning hand: {winner}')
+        print(f'Winning hand: {winner}', file=output)
 
 
 def get_list_as_sentence(my_list):
@@ -1110,9 +854,10 @@ def get_list_as_sentence(my_list):
     return sentence
 
 
-def print_error(message, bullet_points=None):
+def print_error(message, bullet_points=None, output=None):
     """
-    Prints a specific user input error to the terminal
+    Prints a specific user input error to output, or the
+    terminal if it is None
     """
     error_message = f'Invalid input: {message}'
     # Support for bullet points
@@ -1123,7 +868,7 @@ def print_error(message, bullet_points=None):
     else:
         error_message += '. '
     error_message += 'Please try again.\n'
-    print(error_message)
+    print(error_message, file=output)
 
 
 def contains_word(input_word, word):
@@ -1248,28 +993,28 @@ def extract_word(input_word, word):
     return final_string
 
 
-def user_allows(message):
+def user_allows(message, output=None):
     """
     Asks a user a yes/no question, and returns True or
     False depending on what the user entered
     """
     while True:
-        print(message)
-        answer = input('Your answer (Y/N): ')
+        print(message, file=output)
+        answer = yield 'Your answer (Y/N): '
         answer = answer.strip()
-        print('')
+        print('', file=output)
         if contains_word(answer, 'Yes'):
             return True
         elif contains_word(answer, 'No'):
             return False
         else:
-            print('Please enter Yes (Y) or No (N)\n')
+            print('Please enter Yes (Y) or No (N)\n', file=output)
 
 
-def number_in_range(name, number, low_range, high_range):
+def number_in_range(name, number, low_range, high_range, output=None):
     """
     Returns if a given number is within a certain range,
-    and prints an error if it isn't
+    and prints an error to output if it isn't
     """
     if number >= low_range and number <= high_range:
         return True
@@ -1282,7 +1027,7 @@ def number_in_range(name, number, low_range, high_range):
     else:
         error_str = f'Need at least {low_range} '
     error_str += f'{name}s. You have entered {number}'
-    print_error(error_str)
+    print_error(error_str, output=output)
     return False
 
 
@@ -1299,42 +1044,6 @@ def string_to_list(text):
     return new_list
 
 
-def sort_dict_list(dict_list, ascending, *keys):
-    """
-    Sorts a list of dictionaries in ascending/descending
-    order in terms of it's given keys, with the first
-    given key taking precedence
-    """
-    sorted_list = []
-    while len(dict_list) > 0:
-        best_value = dict_list[0]
-        best_index = 0
-        for index in range(1, len(dict_list)):
-            is_best = True
-            for key in keys:
-                current_key = dict_list[index][key]
-                # Skip this iteration if the value is a string
-                if isinstance(current_key, str):
-                    continue
-                # Determining whether this index has the best
-                # value depending on the order of the list
-                if current_key < best_value[key]:
-                    is_best = ascending
-                    break
-                if current_key > best_value[key]:
-                    is_best = not ascending
-                    break
-                # The for loop only continues if the values at
-                # this key are equal. Then the loop will move
-                # to a lower priority key
-            if is_best:
-                best_value = dict_list[index]
-                best_index = index
-        sorted_list.append(best_value)
-        dict_list.pop(best_index)
-    return sorted_list
-
-
 def get_percent(value, total):
     """
     Returns what percentage value is of total
@@ -1342,62 +1051,439 @@ def get_percent(value, total):
     return (value / total) * 100
 
 
-def start_round():
+def start_round(state):
     """
     Initiates a round of poker, collecting one or more
     hands and displaying the winner if more than one
     """
+    deck = state.deck
+    output = state.output
     # Resetting the player names and deck each round
-    deck.cards = deck.get_full()
-    names.clear()
+    deck.reset()
+    state.names.clear()
 
-    wildcards = get_wildcards()
+    wildcards = yield from get_wildcards(output)
     deck.wildcards = wildcards
 
-    player_hands = []
+    round_hands = RoundHands()
     card_number = 0
     while True:
-        hand_input = get_hand_input(card_number)
-        player_hands.append(hand_input)
+        hand_input = yield from get_hand_input(state, card_number)
+        round_hands.add_hand(hand_input, deck.wildcards)
         if card_number == 0:
             card_number = len(hand_input.cards)
-        print_hand_table(player_hands, card_number)
+        print_hand_table(state, round_hands, card_number)
         if len(deck.cards) < card_number:
-            print('\nNot enough cards for another hand!')
+            print('\nNot enough cards for another hand!', file=output)
             break
-        if not user_allows('\nDo you wish to add another hand?'):
+        if not (yield from user_allows(
+                '\nDo you wish to add another hand?', output)):
             break
     # Congratulates the winner at the end of the round
-    if len(player_hands) > 1:
-        winners = get_best_hand(player_hands)
+    if len(round_hands.hands) > 1:
+        winners = round_hands.best_hands
         winning_names = get_hand_names(winners)
         winner_text = 'Congratulations '
         winner_text += get_list_as_sentence(winning_names)
         winner_text += '! You won!\n'
-        print(winner_text)
+        print(winner_text, file=output)
 
 
-def main():
+def print_equity(arguments):
     """
-    Initializes the game.
+    Prints the chance of each hand given on the command line
+    winning, drawing and losing. Returns False if any of the
+    hands or wild cards are invalid
     """
-    # Stores all the cards that haven't been taken
-    global deck
+    wildcards = []
+    if arguments.wild is not None:
+        wildcards = validate_wildcards(arguments.wild)
+        if wildcards is None:
+            return False
+    # The cards of every hand are taken from the same deck
     deck = Deck()
-    # For storing all the player names
-    global names
-    names = []
+    hands = []
+    for hand_text in arguments.equity:
+        card_objects = get_card_inputs(hand_text)
+        if card_objects is None:
+            return False
+        cards = convert_hand(card_objects, deck)
+        if cards is None:
+            return False
+        hands.append(cards)
+    # Checked before the preflop table is used, so a bad number of
+    # trials is rejected whether or not any deals are tried
+    if not arguments.exact and arguments.trials < 1:
+        print_error('At least 1 trial is needed')
+        return False
+    # Starting hands against random opponents are looked up in the
+    # preflop table, unless exact or repeatable deals were asked for
+    chances = None
+    if (len(hands) == 1 and not arguments.exact and
+            arguments.seed is None):
+        chance = get_preflop_equity(
+            hands[0], arguments.opponents, wildcards, arguments.cards
+        )
+        if chance is not None:
+            chances = [chance]
+    if chances is None:
+        chances = calculate_chances(hands, wildcards, arguments, deck)
+        if chances is None:
+            return False
+
+    print_wildcards(wildcards)
+    print(f'{"Hand:":<32}Win:\tTie:\tLose:')
+    for cards, chance in zip(hands, chances):
+        card_text = ''
+        for card in cards:
+            card_text += card.description(wildcards) + ' '
+        # Filling in the cards that will be dealt at random
+        for i in range(len(cards), arguments.cards):
+            card_text += '?? '
+        print_text = f'{card_text:<32}'
+        for result in ('win', 'tie', 'lose'):
+            print_text += f'{float(chance[result]) * 100:.1f}%\t'
+        print(print_text.rstrip())
+    if arguments.opponents > 0:
+        print(f'Against {arguments.opponents} random hand(s)')
+    return True
+
+
+def calculate_chances(hands, wildcards, arguments, deck):
+    """
+    Returns the chances of each hand by trying every deal or
+    random deals of the cards left in a deck, or None if the
+    hands can't be dealt
+    """
+    try:
+        if arguments.exact:
+            return calculate_equity(
+                hands, arguments.cards, wildcards, arguments.opponents,
+                arguments.workers, deck.cards
+            )
+        return estimate_equity(
+            hands, arguments.cards, wildcards, arguments.opponents,
+            arguments.trials, arguments.seed, arguments.workers, deck.cards
+        )
+    except ValueError as error:
+        print_error(str(error))
+        return None
+
+
+def print_range_equity(arguments):
+    """
+    Prints the chance of a hand from each of the two ranges given
+    on the command line beating the other. Returns False if either
+    range or the wild cards are invalid
+    """
+    # Ranges need numpy, which the rest of the game can run without
+    from poker.ranges import calculate_range_equity
+
+    wildcards = []
+    if arguments.wild is not None:
+        wildcards = validate_wildcards(arguments.wild)
+        if wildcards is None:
+            return False
+    seed = arguments.seed
+    if seed is None:
+        seed = 0
+    try:
+        chances = calculate_range_equity(
+            arguments.ranges[0], arguments.ranges[1], arguments.cards,
+            wildcards, trials=arguments.trials, seed=seed
+        )
+    except ValueError as error:
+        print_error(str(error))
+        return False
+
+    print_wildcards(wildcards)
+    print(f'{"Range:":<32}Win:\tTie:\tLose:')
+    for range_text, chance in zip(arguments.ranges, chances):
+        print_text = f'{range_text:<32}'
+        for result in ('win', 'tie', 'lose'):
+            print_text += f'{chance[result] * 100:.1f}%\t'
+        print(print_text.rstrip())
+    return True
 
-    print('Welcome to Python Poker!\n')
-    print('Python Poker will read one or more poker hands,')
-    print('taking wild cards into consideration, and will display')
-    print('the values of each hand, as well as the winner.\n')
+
+def run_batch(arguments):
+    """
+    Evaluates the groups of hands in a file, or in the standard input
+    if the file is "-", and prints the result of each group as a line
+    of JSON as soon as it is ready. Returns False if the file or the
+    wild cards are invalid
+    """
+    wildcards = []
+    if arguments.wild is not None:
+        wildcards = validate_wildcards(arguments.wild)
+        if wildcards is None:
+            return False
+    try:
+        if arguments.batch == '-':
+            batch_file = sys.stdin
+        else:
+            batch_file = open(arguments.batch, newline='')
+    except OSError as error:
+        print_error(str(error))
+        return False
+    with batch_file:
+        records = read_records(batch_file, arguments.format)
+        for result in stream_results(
+            records, wildcards, arguments.workers or 1
+        ):
+            # Flushing each result, so it can be read as soon as it is
+            # ready even when the output is piped
+            print(json.dumps(result), flush=True)
+    return True
+
+
+def check_history(arguments):
+    """
+    Checks the winner of every showdown in a hand history file,
+    printing each showdown where the recorded winner is different
+    as a line of JSON, followed by the number of hands checked.
+    Returns False if the file can't be opened
+    """
+    try:
+        history_file = open(
+            arguments.history, encoding='utf-8', errors='replace'
+        )
+    except OSError as error:
+        print_error(str(error))
+        return False
+    totals = {}
+    with history_file:
+        for result in audit_histories(history_file, totals):
+            if not result['match']:
+                print(json.dumps(result))
+    print(json.dumps(totals))
+    return True
+
+
+def serve_requests():
+    """
+    Answers requests written as lines of JSON in the standard input
+    until it closes, writing each answer as soon as it is ready
+    """
+    def write(text):
+        """
+        Writes an answer without waiting for more of them
+        """
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    serve(sys.stdin, write)
+
+
+async def serve_sessions(host, port):
+    """
+    Plays a separate game with every connection to a port, all in
+    this process. Each connection is treated as a terminal, so the
+    user's typing is echoed back and lines end with carriage returns
+    """
+    server = await asyncio.start_server(play_session, host, port)
+    print(f'Serving games on {host}:{port}')
+    async with server:
+        await server.serve_forever()
+
+
+async def play_session(reader, writer):
+    """
+    Plays a game with a single connection until the game finishes
+    or the connection closes
+    """
+    session = GameSession()
+    line = ''
+    last_char = ''
+    try:
+        writer.write(get_terminal_text(session.send()))
+        while not session.finished:
+            data = await reader.read(1024)
+            if not data:
+                break
+            echo = ''
+            for char in data.decode('utf-8', errors='ignore'):
+                # Enter sends a carriage return, and some clients
+                # follow it with a new line
+                if char == '\n' and last_char == '\r':
+                    pass
+                elif char in '\r\n':
+                    echo += '\r\n'
+                    writer.write(echo.encode())
+                    echo = ''
+                    writer.write(get_terminal_text(session.send(line)))
+                    line = ''
+                    if session.finished:
+                        break
+                elif char in '\x7f\b':
+                    if line:
+                        line = line[:-1]
+                        echo += '\b \b'
+                elif char == '\x03':
+                    # Ctrl + C ends the game
+                    session.close()
+                    break
+                elif char.isprintable():
+                    line += char
+                    echo += char
+                last_char = char
+            writer.write(echo.encode())
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        session.close()
+        writer.close()
+
+
+def get_terminal_text(text):
+    """
+    Returns text printed by a game as bytes for a terminal,
+    which needs a carriage return before each new line
+    """
+    return text.replace('\n', '\r\n').encode()
+
+
+def get_arguments():
+    """
+    Reads the options given to run.py on the command line. With no
+    options, the game is played in the terminal
+    """
+    parser = argparse.ArgumentParser(description='Python Poker')
+    parser.add_argument(
+        '--equity', nargs='+', metavar='HAND',
+        help='estimate the chance of each hand winning, e.g. "AH, KH". '
+        'Hands with less than --cards cards are filled at random'
+    )
+    parser.add_argument(
+        '--ranges', nargs=2, metavar='RANGE',
+        help='estimate the chance of a hand from each range winning, '
+        'e.g. "AKs, TT+" "76s-54s, A5s+:0.5"'
+    )
+    parser.add_argument(
+        '--batch', nargs='?', const='-', metavar='FILE',
+        help='evaluate groups of hands in a JSON lines or CSV file, or '
+        'the standard input if no file is given, and print the results '
+        'as JSON lines'
+    )
+    parser.add_argument(
+        '--history', metavar='FILE',
+        help='check the winner of every showdown in a hand history file'
+    )
+    parser.add_argument(
+        '--format', choices=['auto', 'jsonl', 'csv'], default='auto',
+        help='the format of the --batch file (default: auto)'
+    )
+    parser.add_argument(
+        '--serve', action='store_true',
+        help='answer requests written as lines of JSON in the standard '
+        'input, such as {"id": 1, "op": "evaluate", "hand": "AsKsQsJsTs"}'
+    )
+    parser.add_argument(
+        '--sessions', type=int, metavar='PORT',
+        help='play a separate game with every connection to a port, '
+        'all in one process'
+    )
+    parser.add_argument(
+        '--host', default='127.0.0.1',
+        help='the address to listen on with --sessions '
+        '(default: 127.0.0.1)'
+    )
+    parser.add_argument(
+        '--cards', type=int, default=5, choices=range(5, 9),
+        help='the number of cards in each hand (default: 5)'
+    )
+    parser.add_argument(
+        '--opponents', type=int, default=0,
+        help='the number of random hands to play against (default: 0)'
+    )
+    parser.add_argument(
+        '--wild', metavar='RANKS', help='wild card ranks, e.g. "2, Jack"'
+    )
+    parser.add_argument(
+        '--trials', type=int, default=10000,
+        help='the number of random deals to try (default: 10000)'
+    )
+    parser.add_argument(
+        '--exact', action='store_true',
+        help='try every possible deal instead of random deals. This is '
+        'only practical when a few cards are missing'
+    )
+    parser.add_argument(
+        '--workers', type=int,
+        help='the number of processes to use (default: one per CPU, '
+        'or 1 with --batch)'
+    )
+    parser.add_argument(
+        '--seed', type=int, help='a seed to repeat the same random deals'
+    )
+    return parser.parse_args()
+
+
+def main():
+    """
+    Initializes the game.
+    """
+    arguments = get_arguments()
+    if arguments.equity is not None:
+        if not print_equity(arguments):
+            sys.exit(1)
+        return
+    if arguments.ranges is not None:
+        if not print_range_equity(arguments):
+            sys.exit(1)
+        return
+    if arguments.batch is not None:
+        if not run_batch(arguments):
+            sys.exit(1)
+        return
+    if arguments.history is not None:
+        if not check_history(arguments):
+            sys.exit(1)
+        return
+
+    if arguments.serve:
+        serve_requests()
+        return
+    if arguments.sessions is not None:
+        asyncio.run(serve_sessions(arguments.host, arguments.sessions))
+        return
+    play_in_terminal(play_game(GameState()))
+
+
+def play_game(state):
+    """
+    Plays rounds of poker with the deck and players of a game state
+    until the user wants to stop
+    """
+    output = state.output
+    print('Welcome to Python Poker!\n', file=output)
+    print('Python Poker will read one or more poker hands,', file=output)
+    print(
+        'taking wild cards into consideration, and will display', file=output
+    )
+    print('the values of each hand, as well as the winner.\n', file=output)
 
     while True:
-        start_round()
-        if not user_allows('Do you want to start another round?'):
+        yield from start_round(state)
+        if not (yield from user_allows(
+                'Do you want to start another round?', output)):
             break
-    print('Thank you for using Python Poker! Goodbye!')
+    print('Thank you for using Python Poker! Goodbye!', file=output)
+
+
+def play_in_terminal(game):
+    """
+    Plays a game in the terminal, answering each message it
+    asks with the user's input
+    """
+    try:
+        message = next(game)
+        while True:
+            message = game.send(input(message))
+    except StopIteration:
+        pass
 
 
-main()
+if __name__ == '__main__':
+    main()